@@ -0,0 +1,203 @@
+'''
+Benchmark suite for Figure.draw. Runs parameterized workloads on an offscreen surface and reports frames per second, per-frame
+latency percentiles and peak allocations. Results can be saved as JSON and compared with the results of another commit.
+
+    python benchmarks/bench_figure.py                                   # default suite
+    python benchmarks/bench_figure.py --series 10 --points 5000 --charts line,scatter --mode append
+    python benchmarks/bench_figure.py --output new.json --compare old.json
+
+Workload modes:
+    static  data is set once, frames measure the unchanged figure
+    update  ydata of each chart is replaced in every frame
+    append  one point is appended to each chart in every frame
+'''
+import argparse, json, math, os, platform, subprocess, sys, time, tracemalloc
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import numpy as np
+import pygame
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+import pygame_chart as pyc
+
+CHART_TYPES = ('line', 'bar', 'scatter', 'density')
+MODES = ('static', 'update', 'append')
+
+# default suite, each workload overrides the command line defaults
+SUITE = [
+    {'series': 1, 'points': 1000, 'charts': 'line', 'mode': 'static'},
+    {'series': 1, 'points': 1000, 'charts': 'line', 'mode': 'update'},
+    {'series': 1, 'points': 100000, 'charts': 'line', 'mode': 'update'},
+    {'series': 20, 'points': 1000, 'charts': 'line', 'mode': 'update', 'legend': True, 'gridlines': True},
+    {'series': 3, 'points': 10000, 'charts': 'line,bar,scatter', 'mode': 'update'},
+    {'series': 1, 'points': 100000, 'charts': 'scatter', 'mode': 'update'},
+    {'series': 1, 'points': 1000000, 'charts': 'density', 'mode': 'update'},
+    {'series': 1, 'points': 1000000, 'charts': 'density', 'mode': 'append'},
+    {'series': 3, 'points': 50, 'charts': 'bar', 'mode': 'update', 'xtype': 'str'},
+    {'series': 5, 'points': 10000, 'charts': 'line', 'mode': 'append', 'max_points': 10000},
+    {'series': 3, 'points': 200, 'charts': 'line,scatter', 'mode': 'append', 'xtype': 'str'},
+]
+
+
+def workload_name(workload):
+    flags = ''.join(' +' + flag for flag in ('legend', 'gridlines') if workload[flag])
+    return '%s %s x%d %dpts %s %dx%d%s' % (
+        workload['mode'], workload['charts'], workload['series'], workload['points'], workload['xtype'],
+        workload['width'], workload['height'], flags)
+
+def make_xdata(workload, start, count):
+    if workload['xtype'] == 'str':
+        return ['c%d' % (i % max(workload['points'], 1)) for i in range(start, start + count)]
+    return np.arange(start, start + count, dtype=np.float64)
+
+def make_ydata(index, start, count, frame=0):
+    # noisy sine wave, different for each series and frame
+    x = np.arange(start, start + count, dtype=np.float64)
+    return np.sin(x / 50 + index + frame / 10) * 10 + index + np.cos(x * 7.3)
+
+def add_charts(figure, workload, frame=0):
+    # adds each series with its chart type, or updates it if it already exists
+    chart_types = workload['charts'].split(',')
+    xdata = make_xdata(workload, 0, workload['points'])
+    for i in range(workload['series']):
+        chart_type = chart_types[i % len(chart_types)]
+        kwargs = {'max_points': workload['max_points']}
+        getattr(figure, chart_type)('series %d' % i, xdata, make_ydata(i, 0, workload['points'], frame), **kwargs)
+
+def make_figure(workload, surface):
+    figure = pyc.Figure(surface, 0, 0, workload['width'], workload['height'])
+    figure.add_title('benchmark')
+    figure.add_xaxis_label('x')
+    figure.add_yaxis_label('y')
+    if workload['legend']:
+        figure.add_legend()
+    if workload['gridlines']:
+        figure.add_gridlines()
+    add_charts(figure, workload)
+    return figure
+
+def run_frames(figure, workload, frames):
+    # runs frames and returns latency of each frame in seconds. data changes are part of the frame
+    latencies = []
+    mode = workload['mode']
+    length = workload['points']
+    for frame in range(1, frames + 1):
+        start = time.perf_counter()
+        if mode == 'update':
+            add_charts(figure, workload, frame)
+        elif mode == 'append':
+            for i in range(workload['series']):
+                figure.extend('series %d' % i, make_xdata(workload, length, 1), make_ydata(i, length, 1))
+            length += 1
+        figure.draw()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) * 1000
+
+def run_workload(workload, frames, warmup):
+    surface = pygame.Surface((workload['width'], workload['height']))
+    figure = make_figure(workload, surface)
+    run_frames(figure, workload, warmup)
+    latencies = run_frames(figure, workload, frames)
+
+    # allocations are measured on a separate run, tracing slows down the frames
+    figure = make_figure(workload, surface)
+    run_frames(figure, workload, warmup)
+    tracemalloc.start()
+    run_frames(figure, workload, max(frames // 10, 1))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    total = sum(latencies)
+    return {
+        'name': workload_name(workload),
+        'workload': workload,
+        'frames': frames,
+        'fps': frames / total if total else math.inf,
+        'mean_ms': total / frames * 1000,
+        'p50_ms': percentile(latencies, 50),
+        'p90_ms': percentile(latencies, 90),
+        'p99_ms': percentile(latencies, 99),
+        'max_ms': max(latencies) * 1000,
+        'peak_alloc_kb': peak / 1024,
+    }
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+def compare(results, baseline_path, threshold):
+    # prints change of p50 latency against baseline results. returns number of regressions above threshold
+    with open(baseline_path) as file:
+        baseline = {result['name']: result for result in json.load(file)['results']}
+    regressions = 0
+    print('\ncompared with %s (p50 latency)' % baseline_path)
+    for result in results:
+        old = baseline.get(result['name'])
+        if old is None:
+            continue
+        change = result['p50_ms'] / old['p50_ms'] - 1 if old['p50_ms'] else 0
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        print('%-60s %9.3f -> %9.3f ms %+7.1f%%%s' % (result['name'], old['p50_ms'], result['p50_ms'], change * 100, flag))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--series', type=int, help='number of series. Runs the default suite if no workload option is given')
+    parser.add_argument('--points', type=int, help='points per series')
+    parser.add_argument('--charts', help="comma separated chart types assigned to series in turn, e.g. 'line,bar,scatter'")
+    parser.add_argument('--mode', choices=MODES)
+    parser.add_argument('--xtype', choices=('numeric', 'str'))
+    parser.add_argument('--legend', action='store_true', default=None)
+    parser.add_argument('--gridlines', action='store_true', default=None)
+    parser.add_argument('--max-points', type=int, help='max_points of each series')
+    parser.add_argument('--width', type=int, default=800)
+    parser.add_argument('--height', type=int, default=600)
+    parser.add_argument('--frames', type=int, default=100)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--output', help='JSON file to save results')
+    parser.add_argument('--compare', help='JSON file of earlier results to compare with')
+    parser.add_argument('--threshold', type=float, default=0.1, help='p50 latency increase reported as regression, default 0.1')
+    args = parser.parse_args()
+
+    defaults = {'series': 1, 'points': 1000, 'charts': 'line', 'mode': 'update', 'xtype': 'numeric', 'legend': False,
+                'gridlines': False, 'max_points': None, 'width': args.width, 'height': args.height}
+    options = {key: getattr(args, key) for key in ('series', 'points', 'charts', 'mode', 'xtype', 'legend', 'gridlines', 'max_points')}
+    options = {key: value for key, value in options.items() if value is not None}
+    workloads = [dict(defaults, **options)] if options else [dict(defaults, **workload) for workload in SUITE]
+    for workload in workloads:
+        if any(chart_type not in CHART_TYPES for chart_type in workload['charts'].split(',')):
+            parser.error('chart types must be line, bar, scatter or density')
+
+    pygame.init()
+    results = []
+    print('%-60s %9s %9s %9s %9s %11s' % ('workload', 'fps', 'p50 ms', 'p99 ms', 'max ms', 'peak KiB'))
+    for workload in workloads:
+        result = run_workload(workload, args.frames, args.warmup)
+        results.append(result)
+        print('%-60s %9.1f %9.3f %9.3f %9.3f %11.1f' % (
+            result['name'], result['fps'], result['p50_ms'], result['p99_ms'], result['max_ms'], result['peak_alloc_kb']))
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'environment': environment(), 'results': results}, file, indent=2)
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+'''
+Micro-benchmark for line chart rendering. Compares drawing a polyline with one pygame.draw.aaline call per segment (former
+ChartArea._draw_line) with the batched pygame.draw.aalines call, and thick lines drawn with one pygame.draw.line call per
+segment with PolylineRenderer. Reports segments per second for each.
+
+    python benchmarks/bench_polyline.py [--points 50000] [--repeat 10] [--line-width 3]
+'''
+import argparse, math, os, sys, time
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import numpy as np
+import pygame
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from pygame_chart.pygame_chart import PolylineRenderer
+
+
+def make_points(n, width, height):
+    # noisy sine wave spanning the whole surface
+    return [(i * (width - 1) / (n - 1), height / 2 + math.sin(i / 50) * height / 3 + (i % 7) - 3) for i in range(n)]
+
+def per_segment(surface, color, points):
+    for i in range(len(points) - 1):
+        pygame.draw.aaline(surface, color, points[i], points[i+1])
+
+def batched(surface, color, points):
+    pygame.draw.aalines(surface, color, False, points)
+
+def thick_functions(line_width):
+    # thick line drawn segment by segment, and with the renderer with and without antialiasing
+    renderer = PolylineRenderer()
+
+    def per_segment_thick(surface, color, points):
+        for i in range(len(points) - 1):
+            pygame.draw.line(surface, color, points[i], points[i+1], line_width)
+
+    def renderer_solid(surface, color, points):
+        renderer.draw(surface, color, points[0], points[1], line_width, antialias=False)
+
+    def renderer_antialiased(surface, color, points):
+        renderer.draw(surface, color, points[0], points[1], line_width, antialias=True)
+
+    return per_segment_thick, renderer_solid, renderer_antialiased
+
+def measure(func, surface, points, repeat):
+    # best of repeat runs, in seconds
+    best = math.inf
+    for _ in range(repeat):
+        surface.fill((255, 255, 255))
+        start = time.perf_counter()
+        func(surface, (0, 0, 255), points)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--points', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--width', type=int, default=800)
+    parser.add_argument('--height', type=int, default=600)
+    parser.add_argument('--line-width', type=int, default=3)
+    args = parser.parse_args()
+
+    pygame.init()
+    surface = pygame.Surface((args.width, args.height))
+    surface.set_clip(pygame.Rect(10, 10, args.width - 20, args.height - 20))
+    points = make_points(args.points, args.width, args.height)
+    segments = args.points - 1
+
+    results = {}
+    for name, func in (('per-segment aaline', per_segment), ('batched aalines', batched)):
+        seconds = measure(func, surface, points, args.repeat)
+        results[name] = seconds
+        print('%-26s %10.2f ms %14.0f segments/s' % (name, seconds * 1000, segments / seconds))
+    print('speedup: %.1fx' % (results['per-segment aaline'] / results['batched aalines']))
+
+    # renderer takes coordinate arrays
+    arrays = tuple(np.array(column) for column in zip(*points))
+    per_segment_thick, renderer_solid, renderer_antialiased = thick_functions(args.line_width)
+    print('line width %d' % args.line_width)
+    for name, func, data in (('per-segment line', per_segment_thick, points), ('renderer', renderer_solid, arrays),
+                             ('renderer antialiased', renderer_antialiased, arrays)):
+        seconds = measure(func, surface, data, args.repeat)
+        results[name] = seconds
+        print('%-26s %10.2f ms %14.0f segments/s' % (name, seconds * 1000, segments / seconds))
+    print('speedup: %.1fx, antialiased %.1fx' % (results['per-segment line'] / results['renderer'],
+                                                 results['per-segment line'] / results['renderer antialiased']))
+
+
+if __name__ == '__main__':
+    main()
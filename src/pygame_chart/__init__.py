@@ -1 +1,2 @@
-from .pygame_chart import Figure, Text
\ No newline at end of file
+from .pygame_chart import Figure, Dashboard, PanZoom, FrameProfiler, Text, TextCache, text_cache, font_registry
+from .export import figure_from_spec, render_figure, save_figure, export_figure, export_batch
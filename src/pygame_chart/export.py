@@ -0,0 +1,132 @@
+'''
+Headless export of figures to image files. Figures are rendered on offscreen surfaces, so no window is needed. pygame is
+initialized with SDL's dummy video driver unless a display is already initialized.
+
+A figure can be described with a spec, a dict of picklable values, so that many figures can be exported in a process pool:
+
+    spec = {
+        'width': 640, 'height': 480,
+        'title': 'Sales', 'legend': True, 'gridlines': True,
+        'charts': [
+            {'type': 'line', 'name': 'revenue', 'xdata': [1, 2, 3], 'ydata': [4, 2, 5]},
+            {'type': 'bar', 'name': 'cost', 'xdata': [1, 2, 3], 'ydata': [1, 3, 2], 'color': (255, 0, 0)},
+        ],
+    }
+    export_batch([(spec, 'sales.png')])
+'''
+import os
+from multiprocessing import Pool
+import pygame
+from .pygame_chart import Figure, font_registry
+from .settings import *
+
+# formats written as raw pixel bytes, any other file extension is saved with pygame.image.save
+RAW_FORMATS = ('raw', 'rgb')
+
+def init_headless():
+    '''
+    Initializes pygame for rendering without a window and loads the default fonts once. Called once by each worker of export_batch
+    '''
+    if not pygame.display.get_init():
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    pygame.init()
+    for font_size in (FONT_SIZE, TITLE_FONT_SIZE):
+        font_registry.get_freetype(None, font_size)
+
+def figure_from_spec(spec):
+    '''
+    Creates a figure drawn on its own offscreen surface from a spec.
+    spec:   dict    width and height are required. bg_color, title, legend, xaxis_label, yaxis_label, gridlines, xlim, ylim, bar_mode,
+                    category_order and trusted_data are optional and set with the Figure method of the same name. charts is a list of
+                    dicts with type 'line', 'bar', 'scatter' or 'density', other keys are passed to that method of Figure
+    '''
+    width, height = spec['width'], spec['height']
+    figure = Figure(pygame.Surface((width, height)), 0, 0, width, height, spec.get('bg_color', BG_COLOR))
+    if spec.get('trusted_data'):
+        figure.set_trusted_data(True)
+    if spec.get('title') is not None:
+        figure.add_title(spec['title'])
+    if spec.get('legend'):
+        figure.add_legend()
+    if spec.get('yaxis_label') is not None:
+        figure.add_yaxis_label(spec['yaxis_label'])
+    if spec.get('xaxis_label') is not None:
+        figure.add_xaxis_label(spec['xaxis_label'])
+    if spec.get('gridlines'):
+        figure.add_gridlines()
+    if spec.get('xlim') is not None:
+        figure.set_xlim(tuple(spec['xlim']))
+    if spec.get('ylim') is not None:
+        figure.set_ylim(tuple(spec['ylim']))
+    if spec.get('bar_mode') is not None:
+        figure.set_bar_mode(spec['bar_mode'])
+    if spec.get('category_order') is not None:
+        figure.set_category_order(spec['category_order'])
+    for chart in spec.get('charts', ()):
+        chart = dict(chart)
+        chart_type = chart.pop('type')
+        if chart_type not in ('line', 'bar', 'scatter', 'density'):
+            raise KeyError("Chart type must be 'line', 'bar', 'scatter' or 'density'!")
+        getattr(figure, chart_type)(**chart)
+    return figure
+
+def render_figure(figure):
+    '''
+    Renders the figure and returns the surface of the whole figure. Nothing is blitted to the screen of the figure
+    '''
+    with figure.lock:
+        figure._render()
+    return figure.background
+
+def save_figure(figure, path, format=None):
+    '''
+    Renders the figure and saves it to a file.
+    path:   str     File path
+    format: str     'png' or any other format pygame.image.save supports, or 'raw' for RGB bytes, 3 bytes for each pixel row by row.
+                    Default None takes the format from the file extension
+    '''
+    surface = render_figure(figure)
+    if format is None:
+        format = os.path.splitext(path)[1][1:].lower()
+    if format in RAW_FORMATS:
+        # pygame.image.tostring is the name before pygame 2.1.3
+        to_bytes = getattr(pygame.image, 'tobytes', None) or pygame.image.tostring
+        with open(path, 'wb') as file:
+            file.write(to_bytes(surface, 'RGB'))
+    else:
+        pygame.image.save(surface, path)
+    return path
+
+def export_figure(spec, path, format=None):
+    '''
+    Creates a figure from the spec and saves it to a file. See figure_from_spec and save_figure
+    '''
+    return save_figure(figure_from_spec(spec), path, format)
+
+def _init_worker():
+    # SDL would turn SIGINT and SIGTERM of workers into quit events nobody handles
+    os.environ.setdefault('SDL_NO_SIGNAL_HANDLERS', '1')
+    init_headless()
+
+def _export_job(job):
+    # job is (spec, path) or (spec, path, format)
+    return export_figure(*job)
+
+def export_batch(jobs, processes=None, chunksize=1):
+    '''
+    Exports many figures in a process pool. Each worker initializes pygame and fonts once and renders its figures one after another.
+    jobs:       iterable    (spec, path) or (spec, path, format) tuples. specs and their data must be picklable
+    processes:  int         Number of worker processes. Default None uses all cores. 0 exports in the calling process
+    chunksize:  int         Number of jobs sent to a worker at once. Larger chunks cost less for many small figures
+    Returns list of the saved paths in the order of jobs
+    '''
+    if processes == 0:
+        init_headless()
+        return [_export_job(job) for job in jobs]
+    pool = Pool(processes, initializer=_init_worker)
+    try:
+        return pool.map(_export_job, jobs, chunksize)
+    finally:
+        # workers are let to exit by themselves, terminating them is not reliable once SDL is initialized
+        pool.close()
+        pool.join()
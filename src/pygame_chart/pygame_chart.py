@@ -1,8 +1,262 @@
-import pygame, math, pygame.freetype
+import pygame, copy, math, time, numbers, threading, functools, pygame.freetype
+import numpy as np
+from collections import OrderedDict, deque
+from bisect import bisect_left, insort
+from itertools import repeat
 from .settings import *
 from .util_functions import *
 
 
+def synchronized(method):
+    # runs the method of figure holding figure.lock, so data is not changed while the render thread calculates the layout and
+    # copies the charts
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class FontRegistry:
+    '''
+    Process-wide registry of font objects keyed by (module, face, size). Creating a SysFont searches the system font list and
+    loads the font file, therefore each font is created once and shared by all Text and TextFont objects
+    '''
+    def __init__(self):
+        self.fonts = {}
+
+    def get_freetype(self, face, size):
+        # font from pygame.freetype module, used by Text
+        key = ('freetype', face, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = self.fonts[key] = pygame.freetype.SysFont(face, size)
+        return font
+
+    def get_font(self, face, size):
+        # font from pygame.font module, used by TextFont
+        key = ('font', face, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = self.fonts[key] = pygame.font.SysFont(face, size)
+        return font
+
+    def clear(self):
+        self.fonts.clear()
+
+
+class TextCache:
+    '''
+    Bounded LRU cache of rendered text surfaces, shared by all Text and TextFont objects. Figure.draw creates the same tick,
+    label and legend texts every frame, so each surface is rendered once and reused until it is evicted.
+    Cached surfaces are shared, they must not be drawn on.
+    max_size:   int     Maximum number of surfaces kept. Default = TEXT_CACHE_SIZE in settings.py
+    '''
+    def __init__(self, max_size=TEXT_CACHE_SIZE, registry=None):
+        self.max_size = max_size
+        self.registry = registry if registry is not None else font_registry
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # figures rendered on threads share the cache. font rendering is also done holding the lock
+        self.lock = threading.RLock()
+
+    def get(self, text, font_size=FONT_SIZE, text_color=TEXT_COLOR, vertical=False, module='freetype', face=None):
+        '''
+        Returns the rendered surface for given text and style. Renders and stores it if not cached yet
+        '''
+        key = (text, font_size, tuple(text_color), vertical, module, face)
+        with self.lock:
+            surface = self.surfaces.get(key)
+            if surface is not None:
+                self.hits += 1
+                self.surfaces.move_to_end(key)
+                return surface
+
+            self.misses += 1
+            surface = self._render(text, font_size, text_color, vertical, module, face)
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.max_size:
+                self.surfaces.popitem(last=False)
+                self.evictions += 1
+            return surface
+
+    def _render(self, text, font_size, text_color, vertical, module, face):
+        if module == 'freetype':
+            surface, _ = self.registry.get_freetype(face, font_size).render(text, text_color)
+        else:
+            surface = self.registry.get_font(face, font_size).render(text, True, text_color)
+        if vertical:
+            surface = pygame.transform.rotate(surface, 90)
+        return surface
+
+    def stats(self):
+        '''
+        Returns hit, miss and eviction counters with current and maximum cache size
+        '''
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self.surfaces),
+            'max_size': self.max_size,
+        }
+
+    def clear(self):
+        # drops all surfaces and resets counters
+        with self.lock:
+            self.surfaces.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+class MarkerCache:
+    '''
+    Cache of scatter chart marker sprites keyed by (shape, radius, color). Each marker is rasterized once on a colorkey surface
+    and stamped on the chart for all points with one Surface.blits call
+    '''
+    shapes = ('circle', 'square', 'diamond', 'triangle', 'cross', 'plus')
+
+    def __init__(self):
+        self.sprites = {}
+
+    def get(self, shape, radius, color):
+        key = (shape, radius, tuple(color))
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = self.sprites[key] = self._render(shape, radius, color)
+        return sprite
+
+    def _render(self, shape, radius, color):
+        if shape not in self.shapes:
+            raise KeyError('Marker must be one of %s!' % ', '.join(self.shapes))
+        size = 2 * radius + 1
+        c = radius # center of the sprite
+        line_width = max(radius // 2, 1)
+        colorkey = (255, 0, 255) if tuple(color) != (255, 0, 255) else (0, 255, 0)
+        sprite = pygame.Surface((size, size))
+        sprite.fill(colorkey)
+        if shape == 'circle':
+            pygame.draw.circle(sprite, color, (c, c), radius)
+        elif shape == 'square':
+            sprite.fill(color)
+        elif shape == 'diamond':
+            pygame.draw.polygon(sprite, color, [(c, 0), (size - 1, c), (c, size - 1), (0, c)])
+        elif shape == 'triangle':
+            pygame.draw.polygon(sprite, color, [(c, 0), (size - 1, size - 1), (0, size - 1)])
+        elif shape == 'cross':
+            pygame.draw.line(sprite, color, (0, 0), (size - 1, size - 1), line_width)
+            pygame.draw.line(sprite, color, (0, size - 1), (size - 1, 0), line_width)
+        elif shape == 'plus':
+            pygame.draw.line(sprite, color, (c, 0), (c, size - 1), line_width)
+            pygame.draw.line(sprite, color, (0, c), (size - 1, c), line_width)
+        sprite.set_colorkey(colorkey, pygame.RLEACCEL)
+        return sprite
+
+    def clear(self):
+        self.sprites.clear()
+
+
+class PolylineRenderer:
+    '''
+    Rasterizer of thick polylines. All segments are drawn with a few bulk calls regardless of the number of points. Body is
+    drawn with pygame.draw.lines, which thickens each segment along its minor axis. Joints where the minor axis of segments
+    changes are filled by stamping a disc sprite with one Surface.blits call. If antialiased, the body is one pixel thinner
+    and both edges are drawn with pygame.draw.aalines. Lines of width 1 are drawn with aalines only.
+    Points are written to a scratch buffer of each thread, which is reused between calls, and passed to pygame in chunks of
+    POLYLINE_CHUNK points sharing their end points. Drawn pixels are the same as with one call
+    '''
+    def __init__(self):
+        self.discs = {}
+        self.local = threading.local()
+
+    def _disc(self, width, color):
+        # joint sprite covering the same pixels as the body of a line with given width
+        key = (width, tuple(color))
+        sprite = self.discs.get(key)
+        if sprite is None:
+            colorkey = (255, 0, 255) if tuple(color) != (255, 0, 255) else (0, 255, 0)
+            sprite = self.discs[key] = pygame.Surface((width, width))
+            sprite.fill(colorkey)
+            pygame.draw.ellipse(sprite, color, sprite.get_rect())
+            sprite.set_colorkey(colorkey, pygame.RLEACCEL)
+        return sprite
+
+    def _points(self, x, y):
+        # points as n x 2 array in the scratch buffer of the thread. buffer grows by doubling
+        scratch = getattr(self.local, 'points', None)
+        if scratch is None or len(scratch) < len(x):
+            scratch = self.local.points = np.empty((max(len(x), 2 * len(scratch) if scratch is not None else 0), 2))
+        points = scratch[:len(x)]
+        points[:, 0] = x
+        points[:, 1] = y
+        return points
+
+    def _lines(self, surface, color, x, y, width=None, antialias=False):
+        # polyline through points x, y drawn in chunks. width is for pygame.draw.lines, antialiased lines are 1 pixel wide
+        points = self._points(x, y)
+        for start in range(0, len(points) - 1, POLYLINE_CHUNK):
+            chunk = points[start:start + POLYLINE_CHUNK + 1].tolist()
+            if antialias:
+                pygame.draw.aalines(surface, color, False, chunk)
+            else:
+                pygame.draw.lines(surface, color, False, chunk, width or 1)
+
+    def _edge_offsets(self, dx, dy, steep, half):
+        # offset of the left edge at each point. each segment is offset along its minor axis, and at each joint the edges of
+        # both segments meet at their crossing. if the crossing is far away or does not exist, middle of the offsets is used
+        length = np.hypot(dx, dy)
+        ox = np.where(steep, np.sign(-dy / length) * half, 0.0)
+        oy = np.where(steep, 0.0, np.sign(dx / length) * half)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t = ((ox[1:] - ox[:-1]) * dy[1:] - (oy[1:] - oy[:-1]) * dx[1:]) / (dx[:-1] * dy[1:] - dy[:-1] * dx[1:])
+            mx, my = ox[:-1] + t * dx[:-1], oy[:-1] + t * dy[:-1]
+        far = ~np.isfinite(mx) | (np.hypot(mx, my) > 2 * half)
+        mx = np.where(far, (ox[:-1] + ox[1:]) / 2, mx)
+        my = np.where(far, (oy[:-1] + oy[1:]) / 2, my)
+        return np.concatenate(([ox[0]], mx, [ox[-1]])), np.concatenate(([oy[0]], my, [oy[-1]]))
+
+    def draw(self, surface, color, x, y, width=1, antialias=True):
+        '''
+        Draws the polyline through points x, y on surface. Drawing is limited by the clip area of surface
+        '''
+        dx, dy = np.diff(x), np.diff(y)
+        # repeated points have no direction
+        moved = np.append(True, (dx != 0) | (dy != 0))
+        if not moved.all():
+            x, y = x[moved], y[moved]
+            dx, dy = np.diff(x), np.diff(y)
+        if len(x) < 2:
+            return
+        width = max(int(round(width)), 1)
+        if width == 1:
+            self._lines(surface, color, x, y, antialias=antialias)
+            return
+
+        # pygame.draw.lines truncates coordinates. with an even width, the body would be off center by half a pixel
+        body = width - 1 + width % 2 if antialias else width
+        bx, by = np.floor(x + 0.5), np.floor(y + 0.5)
+        self._lines(surface, color, bx, by, body)
+        steep = np.abs(dy) > np.abs(dx)
+        joints = np.flatnonzero(steep[1:] != steep[:-1]) + 1
+        if body > 1 and len(joints):
+            disc = self._disc(body, color)
+            surface.blits(zip(repeat(disc), zip((bx[joints] - body // 2).tolist(), (by[joints] - body // 2).tolist())), doreturn=False)
+        if antialias:
+            ox, oy = self._edge_offsets(dx, dy, steep, (width - 1) / 2)
+            self._lines(surface, color, x + ox, y + oy, antialias=True)
+            self._lines(surface, color, x - ox, y - oy, antialias=True)
+
+    def clear(self):
+        self.discs.clear()
+
+
+font_registry = FontRegistry()
+text_cache = TextCache()
+marker_cache = MarkerCache()
+polyline_renderer = PolylineRenderer()
+
+
 class TextFont:
     '''
     Text class, teking a string as argument and blit on any surface and position
@@ -12,12 +266,10 @@ class TextFont:
     
 
     def __init__(self, text, vertical=False, font_size=FONT_SIZE, text_color=TEXT_COLOR):
-        self.font = pygame.font.SysFont(None, font_size)
-        self.text_color = TEXT_COLOR
+        self.font = font_registry.get_font(None, font_size)
+        self.text_color = text_color
         self.source_text = str(text)
-        self.txt = self.font.render(self.source_text, True, self.text_color)
-        if vertical:
-            self.txt = pygame.transform.rotate(self.txt, 90)
+        self.txt = text_cache.get(self.source_text, font_size, self.text_color, vertical, module='font')
 
     def write_fron_textOb(self, surface, position, align='center'): # align in ['center','topleft','center_vertical']
         txt_rect = self.txt.get_rect()
@@ -35,21 +287,21 @@ class Text:
     '''
     Text class, teking a string as argument and blit on any surface and position
     Utilizes pygame.freetype module. This class is used in pygameChart as default.
+    Fonts and rendered surfaces are taken from the shared font_registry and text_cache
     text:       string      Text to be written
     vertical:   boolean     True if the text is rotated clockwise for 90 degree
     font_size:  number      Default = 12 in settings.py
     text_color: RGB tuple   Default = (0,0,0) in settings.py
     '''
+    __slots__ = ('font', 'text_color', 'source_text', 'txt', 'txt_rect')
     pygame.freetype.init()
 
     def __init__(self, text, vertical=False, font_size=FONT_SIZE, text_color=TEXT_COLOR):
-        self.font = pygame.freetype.SysFont(None, font_size)
+        self.font = font_registry.get_freetype(None, font_size)
         self.text_color = text_color
         self.source_text = str(text)
-        self.txt, self.txt_rect = self.font.render(self.source_text, self.text_color)
-        if vertical:
-            self.txt = pygame.transform.rotate(self.txt, 90)
-            self.txt_rect = self.txt.get_rect()
+        self.txt = text_cache.get(self.source_text, font_size, self.text_color, vertical)
+        self.txt_rect = self.txt.get_rect()
 
     def write_fron_textOb(self, surface, position, align='center'): # align in ['center','topleft','center_vertical']
         if align == 'center':
@@ -63,6 +315,89 @@ class Text:
 
 
 
+class FrameProfiler:
+    '''
+    Timings of the phases of Figure.draw for each frame, in milliseconds. Phases are layout, data, ticks, gridlines, charts,
+    text, compose and blit, with total for the whole frame. Each line and scatter chart is also timed as 'chart <name>' and all
+    bar charts together as 'bars'. A phase which is skipped in a frame, e.g. charts when the data did not change, counts as 0.
+    window:     int         Number of frames for rolling averages and maxima. Default = PROFILER_WINDOW in settings.py
+    callback:   callable    Called after each frame with dict of timings of that frame
+    '''
+    def __init__(self, window=PROFILER_WINDOW, callback=None):
+        self.window = window
+        self.callback = callback
+        self.samples = {}
+        self.frames = 0
+        self.last = {}
+        self.frame_start = self.lap_start = None
+
+    def start_frame(self):
+        self.last = {}
+        self.frame_start = self.lap_start = time.perf_counter()
+
+    def lap(self, phase):
+        # adds the time since the previous lap to the phase
+        now = time.perf_counter()
+        self.last[phase] = self.last.get(phase, 0) + (now - self.lap_start) * 1000
+        self.lap_start = now
+
+    def add(self, phase, start):
+        # adds the time since start to the phase. does not end the current lap, used for phases within a lap
+        self.last[phase] = self.last.get(phase, 0) + (time.perf_counter() - start) * 1000
+
+    def end_frame(self):
+        self.last['total'] = (time.perf_counter() - self.frame_start) * 1000
+        for phase in self.last:
+            if phase not in self.samples:
+                # first frame of the phase. former frames are counted as 0
+                self.samples[phase] = deque(repeat(0, min(self.frames, self.window)), maxlen=self.window)
+        for phase, samples in self.samples.items():
+            samples.append(self.last.get(phase, 0))
+        self.frames += 1
+        if self.callback is not None:
+            self.callback(dict(self.last))
+
+    @property
+    def averages(self):
+        # rolling average of each phase
+        return {phase: sum(samples) / len(samples) for phase, samples in self.samples.items()}
+
+    @property
+    def maxima(self):
+        # rolling maximum of each phase
+        return {phase: max(samples) for phase, samples in self.samples.items()}
+
+    def stats(self):
+        '''
+        Returns last, average and max timings of each phase, with number of frames profiled
+        '''
+        averages, maxima = self.averages, self.maxima
+        return {
+            'frames': self.frames,
+            'phases': {phase: {'last': self.last.get(phase, 0), 'avg': averages[phase], 'max': maxima[phase]} for phase in self.samples},
+        }
+
+    def reset(self):
+        self.samples = {}
+        self.frames = 0
+        self.last = {}
+
+    def draw_overlay(self, surface, position):
+        # writes average and max of total and each phase on the surface. rendered without text cache, since numbers change each frame.
+        # nothing is written before the first frame is timed, e.g. while the worker of threaded rendering is on its first frame
+        averages, maxima = self.averages, self.maxima
+        if 'total' not in averages:
+            return
+        font = font_registry.get_freetype(None, FONT_SIZE)
+        x, y = position
+        phases = ['total'] + sorted((phase for phase in averages if phase != 'total'), key=averages.get, reverse=True)
+        with text_cache.lock:
+            for phase in phases:
+                rect = font.render_to(surface, (x, y), '%s %.2f ms (max %.2f)' % (phase, averages[phase], maxima[phase]),
+                                      PROFILER_TEXT_COLOR, PROFILER_BG_COLOR)
+                y += rect.height + 2
+
+
 class Figure:
     '''
     Main figure object initiated with
@@ -85,7 +420,7 @@ class Figure:
         self.height = height
         self.bg_color = bg_color
 
-        # create surface for figure. all drawing is done on Figure.background
+        # create surface for figure. every area is rendered to its own layer and the layers are composed on Figure.background
         self.background = pygame.Surface((self.width, self.height))
         # create instances for all figure areas
         self.title = Title(self)
@@ -95,6 +430,7 @@ class Figure:
         self.xaxis_tick = xAxisTick(self)
         self.yaxis_tick = yAxisTick(self)
         self.chart_area = ChartArea(self)
+        self.gridlines = Gridlines(self)
 
         # set axis limits to None
         self.xmin = self.xmax = None
@@ -102,65 +438,197 @@ class Figure:
         self.chart_area.xdata_min = self.chart_area.xdata_max = None
         self.chart_area.ydata_min = self.chart_area.ydata_max = None
 
+        # data of lists and tuples is checked element by element unless trusted
+        self.trusted_data = False
+
+        # retained mode bookkeeping. version is increased by every change on figure, areas or charts. if nothing changed since
+        # last draw, cached background is blitted as is
+        self.version = 0
+        self.drawn_state = None
+        self.layout = None
+        self.redrawn_areas = []
+        # signature of the inputs title, legend and axis labels are positioned with. their layout is recalculated only if it changes
+        self.area_layout = None
+        # FrameProfiler if profiling is enabled
+        self.profiler = None
+        self.profiler_overlay = False
+
+        # methods changing the figure and rendering hold the lock. in threaded mode, figure is rendered on render_thread and
+        # copied to front buffer, which draw blits. render_thread releases the lock while drawing layers from copies of the
+        # charts. shown_version is the version of the figure in front buffer
+        self.lock = threading.RLock()
+        self.render_thread = None
+        self.render_condition = threading.Condition()
+        self.render_requested = False
+        self.front = None
+        self.shown_version = None
+
+    @synchronized
+    def invalidate(self):
+        '''
+        Forces recalculation and re-rendering of all areas in next draw. Methods of Figure track changes automatically, it is
+        needed only if attributes are modified directly or array data provided to a chart is modified in place
+        '''
+        for chart in self.chart_area.charts:
+            chart._refresh()
+            self.chart_area._set_category_codes(chart, chart.xdata)
+        for _, area in self._layers():
+            area.layer_signature = None
+        self.chart_area.data_version += 1
+        self._changed()
+
+    def _changed(self):
+        # marks the figure as changed. next draw recalculates the figure, but only areas with changed content are re-rendered
+        self.version += 1
+
     def _create_figure(self):
-        # blit figure background to screen
-        self.screen.blit(self.background, (self.x, self.y))
+        # fill figure background before layers are blitted
         self.background.fill(self.bg_color)
 
+    def _layers(self):
+        # areas with own layers in composing order. gridlines are composed into chart area layer, not to the background
+        return (
+            ('gridlines', self.gridlines),
+            ('chart_area', self.chart_area),
+            ('title', self.title),
+            ('legend', self.legend),
+            ('yaxis_label', self.yaxis_label),
+            ('xaxis_label', self.xaxis_label),
+            ('yaxis_tick', self.yaxis_tick),
+            ('xaxis_tick', self.xaxis_tick),
+        )
+
+    @synchronized
     def set_xlim(self, xlim): 
         '''
         Sets xmin and xmax for all charts. Drawings out of these limits are unvisible
         xlim:   tuple(xmin, xmax)
         '''
         if check_axis_limit(xlim):
+            if (self.xmin, self.xmax) != xlim:
+                self._changed()
             self.xmin = xlim[0]
             self.xmax = xlim[1]
             self.chart_area.xdata_type = 'numeric'
             
+    @synchronized
+    def reset_xlim(self):
+        '''
+        Removes xmin and xmax set with set_xlim. x-axis covers all data again
+        '''
+        if self.xmin is not None or self.xmax is not None:
+            self.xmin = self.xmax = None
+            self.chart_area._reset_xdata_type()
+            self._changed()
+
+    @synchronized
     def set_ylim(self, ylim): 
         '''
         Sets ymin and ymax for all charts. Drawings out of these limits are unvisible
         ylim:   tuple(ymin, ymax)
         '''
         if check_axis_limit(ylim):
+            if (self.ymin, self.ymax) != ylim:
+                self._changed()
             self.ymin = ylim[0]
             self.ymax = ylim[1]
 
+    @synchronized
     def add_title(self, title):
         '''
         Adds chart title at the top of the figure
         title:   str
         '''
-        self.title.add_title(title)
-        self.title.show = 1
+        if not self.title.show or self.title.txtOb.source_text != str(title):
+            self.title.add_title(title)
+            self.title.show = 1
+            self._changed()
 
+    @synchronized
     def add_legend(self):
         '''
         Adds legend at the bottom of the figure
         '''
-        self.legend.show = 1
+        if not self.legend.show:
+            self.legend.show = 1
+            self._changed()
 
+    @synchronized
     def add_yaxis_label(self, label):
         '''
         Sets axis label for y-axis.
         label:  str
         '''
-        self.yaxis_label.add_label(label)
-        self.yaxis_label.show = 1
+        if not self.yaxis_label.show or self.yaxis_label.txtOb.source_text != str(label):
+            self.yaxis_label.add_label(label)
+            self.yaxis_label.show = 1
+            self._changed()
 
+    @synchronized
     def add_xaxis_label(self, label):
         '''
         Sets axis label for x-axis.
         label:  str
         '''
-        self.xaxis_label.add_label(label)
-        self.xaxis_label.show = 1
+        if not self.xaxis_label.show or self.xaxis_label.txtOb.source_text != str(label):
+            self.xaxis_label.add_label(label)
+            self.xaxis_label.show = 1
+            self._changed()
 
+    @synchronized
     def add_gridlines(self):
         '''
         Add both vertical and horizontal gridlines
         '''
-        self.chart_area.gridlines = 1
+        if not self.chart_area.gridlines:
+            self.chart_area.gridlines = 1
+            self._changed()
+
+    @synchronized
+    def set_bar_mode(self, mode):
+        '''
+        Sets how multiple bar charts are drawn.
+        mode:   str     'overlap' (default) draws bars of each chart over the former ones, 'group' places bars side by side and
+                        'stack' places bars on top of each other
+        '''
+        if mode not in ('overlap', 'group', 'stack'):
+            raise KeyError("Bar mode must be 'overlap', 'group' or 'stack'!")
+        if mode != self.chart_area.bar_mode:
+            self.chart_area.bar_mode = mode
+            self.chart_area._data_changed()
+
+    @synchronized
+    def set_trusted_data(self, trusted):
+        '''
+        Sets if chart data is trusted. Data of lists and tuples is checked element by element by default. Trusted data is only checked for
+        its type and length, the type of xdata is taken from its first element. Numpy arrays, buffers and ranges are always checked by dtype.
+        trusted: bool   True skips element checks for data added later
+        '''
+        self.trusted_data = bool(trusted)
+
+    @synchronized
+    def set_category_order(self, order):
+        '''
+        Sets the order of categories on x-axis for string xdata.
+        order:  str     'sorted' (default) or 'insertion' for the order of first appearance
+        '''
+        if order not in ('sorted', 'insertion'):
+            raise KeyError("Category order must be 'sorted' or 'insertion'!")
+        if order != self.chart_area.category_order:
+            chart_area = self.chart_area
+            chart_area.category_order = order
+            chart_area.sorted_categories = sorted(chart_area.category_codes) if order == 'sorted' else None
+            chart_area._categories_changed()
+            chart_area._data_changed()
+
+    def _area_layout_signature(self):
+        # everything size and position of title, legend and axis labels depend on
+        return (
+            self.width, self.height,
+            self.title.show, self.title._signature(),
+            self.legend.show, tuple(self.chart_area.series) if self.legend.show else None,
+            self.yaxis_label._signature(), self.xaxis_label._signature(),
+        )
 
     def _set_yaxis_tick(self):
         # set y-tick size and position. initial width is set 0, to be calculated later according to tick text width
@@ -186,84 +654,314 @@ class Figure:
         self.chart_area.y = self.title.height
         self.chart_area.show = 1
 
-    def line(self, name, xdata, ydata, color=None, line_width=2):
+    @synchronized
+    def line(self, name, xdata, ydata, color=None, line_width=2, point_budget=None, max_points=None, x_sorted=None, antialias=None):
         '''
         Adds line chart to the figure.
         name:       str     Name of the chart. Naming charts is necessary to keep track of charts in game loop. Each different chart must 
                             be added with a unique name. If another chart is provided whith the same name, the data updated
-        xdata:      list    all numbers or all string
-        ydata:      list    all numbers
+        xdata:      list    list, tuple or array. all numbers or all string
+        ydata:      list    list, tuple or array. all numbers
         color:      RGB tuple
         line_width: number  width of the line chart
+        point_budget: int   maximum number of points drawn. for denser data, only first, min, max and last points of each column
+                            are drawn. Default None is 4 points per pixel column, 0 draws all points
+        max_points: int     only the last max_points points are kept, appended points push out the oldest ones. Default None
+                            keeps all points
+        x_sorted:   bool    True declares numeric xdata in non-decreasing order, False never treats it as sorted. Default None
+                            detects it. points within x-axis limits of sorted xdata are found with binary search
+        antialias:  bool    True also antialiases the edges of thick lines, which takes two more passes over the points. False
+                            draws without antialiasing. Default None antialiases only lines 1 pixel wide, which costs one pass
         '''
+        if name in self.chart_area.series:
+            self.chart_area._update_chart(name, xdata, ydata, self.trusted_data)
+            return
+
         if color == None:
             i = len(self.chart_area.charts)
             color = COLORS[i%len(COLORS)]
 
         self.chart_area._add_chart(
-            LineChart(name, xdata, ydata, color, line_width)
+            LineChart(name, xdata, ydata, color, line_width, point_budget, max_points, self.trusted_data, x_sorted, antialias)
         )
 
-    def bar(self, name, xdata, ydata, color=None, bar_width=None):
+    @synchronized
+    def bar(self, name, xdata, ydata, color=None, bar_width=None, max_points=None, x_sorted=None):
         '''
         Adds bar chart to the figure.
         name:       str     Name of the chart. Naming charts is necessary to keep track of charts in game loop. Each different chart must 
                             be added with a unique name. If another chart is provided whith the same name, the data updated
-        xdata:      list    all numbers or all string
-        ydata:      list    all numbers
+        xdata:      list    list, tuple or array. all numbers or all string
+        ydata:      list    list, tuple or array. all numbers
         color:      RGB tuple
         bar_width:  number  width of the bar chart
+        max_points: int     only the last max_points points are kept, appended points push out the oldest ones. Default None
+                            keeps all points
+        x_sorted:   bool    True declares numeric xdata in non-decreasing order, False never treats it as sorted. Default None
+                            detects it. points within x-axis limits of sorted xdata are found with binary search
         '''
+        if name in self.chart_area.series:
+            self.chart_area._update_chart(name, xdata, ydata, self.trusted_data)
+            return
+
         if color == None:
             i = len(self.chart_area.charts)
             color = COLORS[i%len(COLORS)]
 
         self.chart_area._add_chart(
-            BarChart(name, xdata, ydata, color, bar_width)
+            BarChart(name, xdata, ydata, color, bar_width, max_points, self.trusted_data, x_sorted)
         )
 
-    def scatter(self, name, xdata, ydata, color=None, radius=3):
+    @synchronized
+    def scatter(self, name, xdata, ydata, color=None, radius=3, max_points=None, marker='circle', x_sorted=None):
         '''
         Adds scatter chart to the figure.
         name:       str     Name of the chart. Naming charts is necessary to keep track of charts in game loop. Each different chart must 
                             be added with a unique name. If another chart is provided whith the same name, the data updated
-        xdata:      list    all numbers or all string
-        ydata:      list    all numbers
+        xdata:      list    list, tuple or array. all numbers or all string
+        ydata:      list    list, tuple or array. all numbers
         color:      RGB tuple
         radius:     number  radius of the marker
+        max_points: int     only the last max_points points are kept, appended points push out the oldest ones. Default None
+                            keeps all points
+        marker:     str     shape of the marker. 'circle', 'square', 'diamond', 'triangle', 'cross' or 'plus'
+        x_sorted:   bool    True declares numeric xdata in non-decreasing order, False never treats it as sorted. Default None
+                            detects it. points within x-axis limits of sorted xdata are found with binary search
+        '''
+        if name in self.chart_area.series:
+            self.chart_area._update_chart(name, xdata, ydata, self.trusted_data)
+            return
+
+        if color == None:
+            i = len(self.chart_area.charts)
+            color = COLORS[i%len(COLORS)]
+
+        self.chart_area._add_chart(
+            ScatterChart(name, xdata, ydata, color, radius, max_points, marker, self.trusted_data, x_sorted)
+        )
+
+    @synchronized
+    def remove_series(self, name):
+        '''
+        Removes the chart with the name from the figure.
+        name:   str     Name of the chart added with line, bar or scatter
+        '''
+        self.chart_area._remove_chart(name)
+
+    @synchronized
+    def clear(self):
         '''
+        Removes all charts from the figure. Title, labels, legend, gridlines and axis limits are kept
+        '''
+        self.chart_area._clear_charts()
+
+    @synchronized
+    def density(self, name, xdata, ydata, color=None, bins=None, colormap=None, log=True, max_points=None, x_sorted=None):
+        '''
+        Adds density chart to the figure. Points are counted in a 2d histogram over the x and y-axis ranges, and each bin is
+        colored by its count. Points appended later are added to the counts without counting the former points again.
+        name:       str     Name of the chart. If another chart is provided whith the same name, the data updated
+        xdata:      list    list, tuple or array. all numbers
+        ydata:      list    list, tuple or array. all numbers
+        color:      RGB tuple   color of bins with the most points. Default colormap fades from the background to it
+        bins:       int     number of bins along each axis, or (x bins, y bins). Default None is one bin for each pixel
+        colormap:   list    RGB color stops for counts from low to high, instead of the default one
+        log:        bool    colors follow the logarithm of counts. False colors bins in proportion to counts
+        max_points: int     only the last max_points points are kept, appended points push out the oldest ones. Default None
+                            keeps all points
+        x_sorted:   bool    True declares xdata in non-decreasing order, False never treats it as sorted. Default None
+                            detects it. points within x-axis limits of sorted xdata are found with binary search
+        '''
+        if name in self.chart_area.series:
+            self.chart_area._update_chart(name, xdata, ydata, self.trusted_data)
+            return
+
         if color == None:
             i = len(self.chart_area.charts)
             color = COLORS[i%len(COLORS)]
 
         self.chart_area._add_chart(
-            ScatterChart(name, xdata, ydata, color, radius)
+            DensityChart(name, xdata, ydata, color, bins, colormap, log, max_points, self.trusted_data, x_sorted)
         )
 
-    def _set_filler(self, x, y, width, height):
-        # adds a filler area to the empty space left in corner of x-y label areas and x-y tick areas
-        filler = Area(self)
-        filler.x = x
-        filler.y = y
-        filler.width = width
-        filler.height = height
-        filler.show = 1
-        filler.draw_area()
+    @synchronized
+    def append(self, name, x, y):
+        '''
+        Appends one point to an existing chart. Cost does not depend on the number of points the chart already has.
+        name:   str     Name of the chart added with line, bar or scatter
+        x:      number or str
+        y:      number
+        '''
+        self.extend(name, [x], [y])
+
+    @synchronized
+    def extend(self, name, xdata, ydata):
+        '''
+        Appends points to an existing chart. Only new points are validated and copied.
+        name:   str     Name of the chart added with line, bar or scatter
+        xdata:  list    list, tuple or array. all numbers or all string
+        ydata:  list    list, tuple or array. all numbers
+        '''
+        self.chart_area._extend_chart(name, xdata, ydata, self.trusted_data)
+
+    @synchronized
+    def enable_profiler(self, window=PROFILER_WINDOW, callback=None, overlay=False):
+        '''
+        Starts timing the phases of each draw. Timings are kept in Figure.profiler, see FrameProfiler.
+        window:     int         Number of frames for rolling averages and maxima
+        callback:   callable    Called after each draw with dict of phase timings of that frame in milliseconds
+        overlay:    bool        True writes averages and maxima on the topleft of the figure after each draw
+        '''
+        self.profiler = FrameProfiler(window, callback)
+        self.profiler_overlay = overlay
+
+    @synchronized
+    def disable_profiler(self):
+        '''
+        Stops timing draws and removes the overlay
+        '''
+        self.profiler = None
+        self.profiler_overlay = False
+
+    def enable_threaded_render(self):
+        '''
+        Renders the figure on a worker thread. draw only blits the last completed rendering from a front buffer and asks the
+        worker to render the figure again if it changed, so the game loop is not blocked by calculation and rasterization.
+        Figure.shown_version is the version of the figure on screen, Figure.version is the latest one.
+        Methods changing the figure can be called from any thread. They wait only while layout and ticks are calculated and the
+        charts are copied with their data, layers are drawn from the copies without holding the figure lock
+        '''
+        with self.lock:
+            if self.render_thread is not None:
+                return
+            self.front = pygame.Surface((self.width, self.height))
+            self.front.fill(self.bg_color)
+            self.shown_version = None
+            self.render_thread = threading.Thread(target=self._render_worker, name='pygame_chart render', daemon=True)
+        self.render_thread.start()
+
+    def disable_threaded_render(self):
+        '''
+        Stops the worker thread. Figure is rendered in draw again
+        '''
+        thread = self.render_thread
+        if thread is None:
+            return
+        with self.render_condition:
+            self.render_thread = None
+            self.render_condition.notify_all()
+        thread.join()
+        self.front = None
+        self.shown_version = None
+
+    def wait_rendered(self, timeout=None):
+        '''
+        Waits until the worker thread renders the latest version of the figure. Returns False if timeout in seconds passes first
+        '''
+        if self.render_thread is None:
+            return True
+        with self.render_condition:
+            self._request_render()
+            return self.render_condition.wait_for(lambda: self.shown_version == self.version or self.render_thread is None, timeout)
+
+    def _request_render(self):
+        # asks the worker for a rendering. holds render_condition
+        if not self.render_requested and self.shown_version != self.version:
+            self.render_requested = True
+            self.render_condition.notify_all()
+
+    def _render_worker(self):
+        # renders the figure on its own background and copies it to the front buffer, which draw blits
+        thread = threading.current_thread()
+        while True:
+            with self.render_condition:
+                self.render_condition.wait_for(lambda: self.render_requested or self.render_thread is not thread)
+                if self.render_thread is not thread:
+                    return
+                self.render_requested = False
+            # layout and ticks are calculated holding the lock, charts are copied with their data as of then. layers are drawn
+            # without the lock, so methods changing the figure do not wait for the drawing
+            with self.lock:
+                version = self.version
+                profiler = self.profiler
+                if profiler is not None:
+                    profiler.start_frame()
+                prepared = self._prepare_render(profiler, frozen=True)
+            redrawn = self._draw_layers(prepared, profiler) if prepared is not None else []
+            with self.lock:
+                self.chart_area._keep_frame()
+            with self.render_condition:
+                self.front.blit(self.background, (0, 0))
+                self.shown_version = version
+                self.redrawn_areas = redrawn
+                if profiler is not None:
+                    profiler.lap('blit')
+                    profiler.end_frame()
+                self.render_condition.notify_all()
 
     def draw(self):
         '''
         Draws the figure with setted areas and charts provided. Final method to show the figure
-        '''    
-        self._create_figure()
-
-        # adjustments for size and position of Areas
-        self.title._adjust_size_pos()
-        self.legend._adjust_size_pos()
-        self.yaxis_label._adjust_size_pos()
-        self.xaxis_label._adjust_size_pos()
+        Title, legend, axis labels, ticks, gridlines and chart area are rendered to their own layers, and each layer is re-rendered
+        only if its content changed. If nothing changed since last draw, the cached figure is blitted as is.
+        Returns list of names of the re-rendered areas, empty list if none. Also kept in Figure.redrawn_areas
+        In threaded mode, blits the last rendering and returns names of areas re-rendered for it
+        '''
+        if self.render_thread is not None:
+            return self._draw_threaded()
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.start_frame()
+        with self.lock:
+            self.redrawn_areas = self._render()
+        self.screen.blit(self.background, (self.x, self.y))
+        if profiler is not None:
+            profiler.lap('blit')
+            profiler.end_frame()
+            if self.profiler_overlay:
+                profiler.draw_overlay(self.screen, (self.x + PADDING, self.y + PADDING))
+        return self.redrawn_areas
+
+    def _draw_threaded(self):
+        # blits front buffer and asks for a rendering if the figure changed. does not wait for the figure lock
+        with self.render_condition:
+            self._request_render()
+            self.screen.blit(self.front, (self.x, self.y))
+            if self.profiler is not None and self.profiler_overlay:
+                self.profiler.draw_overlay(self.screen, (self.x + PADDING, self.y + PADDING))
+            return self.redrawn_areas
+
+    def _render(self):
+        # brings Figure.background up to date without blitting to screen. returns names of re-rendered areas. caller holds the lock
+        profiler = self.profiler
+        prepared = self._prepare_render(profiler)
+        redrawn = self._draw_layers(prepared, profiler) if prepared is not None else []
+        self.chart_area._keep_frame()
+        return redrawn
+
+    def _prepare_render(self, profiler, frozen=False):
+        # calculates layout, data ranges and ticks, and finds the layers to re-render. runs holding the lock. returns the state
+        # of the figure with the changed areas and composing layout, None if nothing changed since last rendering. frozen copies
+        # the charts with their data, so that the layers can be drawn after the lock is released
+        state = (self.version, self.width, self.height, self.bg_color)
+        if state == self.drawn_state:
+            return None
+
+        # adjustments for size and position of Areas. x-axis label comes before y-axis label, which fills the height left by it
+        area_layout = self._area_layout_signature()
+        if area_layout != self.area_layout:
+            self.title._adjust_size_pos()
+            self.legend._adjust_size_pos()
+            self.xaxis_label._adjust_size_pos()
+            self.yaxis_label._adjust_size_pos()
+            self.area_layout = area_layout
+        if profiler is not None:
+            profiler.lap('layout')
 
         # chart area and ticks
         self.chart_area._combine_data()
+        if profiler is not None:
+            profiler.lap('data')
 
         self._set_yaxis_tick()
         self.yaxis_tick._calculate_ticks()
@@ -273,30 +971,240 @@ class Figure:
         self.xaxis_tick._calculate_ticks()
         self.xaxis_tick._calculate_height()
         self.xaxis_tick.y = self.height - (self.legend.height + self.xaxis_label.height + self.xaxis_tick.height)
+        if profiler is not None:
+            profiler.lap('ticks')
 
         self._set_chart_area()
         self.chart_area._find_xdata_gap_ydata_multiplier()
-        self.chart_area._draw_gridlines()
-        self.chart_area._draw_all_charts()
-        self.chart_area._draw()
-
-        # drawing
-        self._set_filler(0, self.chart_area.y + self.chart_area.height, self.width, self.height - (self.chart_area.y + self.chart_area.height))
-        self._set_filler(self.width - PADDING, self.chart_area.y, PADDING, self.chart_area.height)
-        self._set_filler(0, self.chart_area.y, self.chart_area.x, self.chart_area.height)
-        self.title._draw()
-        self.legend._draw()
-        self.yaxis_label._draw()
-        self.xaxis_label._draw()
-        self.yaxis_tick._draw()
-        self.xaxis_tick._draw()
+
+        # layers with changed content. gridlines must be updated before chart area, since it is the base of chart area layer
+        changed = [(name, area) for name, area in self._layers() if area._layer_changed()]
+        self.chart_area._take_frame(frozen and any(name in ('chart_area', 'legend') for name, _ in changed))
+        layout = (self.width, self.height, self.bg_color) + tuple((tuple(area.layer_rect), area.show) for _, area in self._layers())
+        if profiler is not None:
+            profiler.lap('layout')
+        return state, changed, layout
+
+    def _draw_layers(self, prepared, profiler):
+        # re-renders changed layers and composes them. returns names of re-rendered areas
+        state, changed, layout = prepared
+        redrawn = []
+        for name, area in changed:
+            area._render_layer()
+            redrawn.append(name)
+            if profiler is not None:
+                profiler.lap(PROFILER_LAYER_PHASES.get(name, 'text'))
+
+        # compose. if layout is the same, only re-rendered layers are blitted over their previous image
+        if layout != self.layout:
+            self.layout = layout
+            self._create_figure()
+            for _, area in self._layers():
+                area._blit_layer()
+        else:
+            for _, area in changed:
+                area._blit_layer()
+        if profiler is not None:
+            profiler.lap('compose')
+
+        self.drawn_state = state
+        return redrawn
+
+
+class Dashboard:
+    '''
+    Container of many figures drawn on one screen. Figures share the font registry and text cache of the module, and each
+    figure is rendered and blitted only when its data or properties changed. Changed figures are blitted with one
+    screen.blits call, and their rects are returned to be passed to pygame.display.update.
+    The screen is filled with bg_color at the first draw, therefore screen should not be cleared in the game loop.
+    screen:     pygame.display  Main display the figures are drawn
+    bg_color:   RGB tuple       Color of screen around figures. Default = (255,255,255) in settings.py
+    '''
+    def __init__(self, screen, bg_color=BG_COLOR):
+        self.screen = screen
+        self.bg_color = bg_color
+        self.figures = []
+        # figure -> (drawn state, rect) when it was last blitted
+        self.blitted = {}
+        # rects of figures removed or moved since last draw, filled with bg_color in next draw
+        self.cleared_rects = []
+        self.dirty_rects = []
+        self.filled = False
+
+    def add_figure(self, x, y, width, height, bg_color=BG_COLOR):
+        '''
+        Creates a figure on the screen of dashboard and adds it. Returns the figure
+        '''
+        figure = Figure(self.screen, x, y, width, height, bg_color)
+        self.figures.append(figure)
+        return figure
+
+    def add(self, figure):
+        '''
+        Adds an existing figure. Figure is drawn on the screen of dashboard
+        '''
+        if figure not in self.figures:
+            self.figures.append(figure)
+
+    def remove(self, figure):
+        '''
+        Removes the figure. Its area is filled with bg_color in next draw
+        '''
+        self.figures.remove(figure)
+        blitted = self.blitted.pop(figure, None)
+        if blitted is not None:
+            self.cleared_rects.append(blitted[1])
+
+    def invalidate(self):
+        '''
+        Blits whole screen and all figures in next draw, e.g. if something else is drawn on the screen
+        '''
+        self.filled = False
+        self.blitted = {}
+
+    def draw(self):
+        '''
+        Renders changed figures and blits them to the screen in one batch.
+        Returns list of rects changed on the screen, empty list if none. Also kept in Dashboard.dirty_rects
+        '''
+        dirty = []
+        filled = not self.filled
+        if filled:
+            self.screen.fill(self.bg_color)
+            self.blitted = {}
+            self.cleared_rects = []
+            self.filled = True
+
+        for rect in self.cleared_rects:
+            self.screen.fill(self.bg_color, rect)
+        dirty += self.cleared_rects
+        self.cleared_rects = []
+
+        batch = []
+        overlays = [figure for figure in self.figures if figure.profiler_overlay]
+        for figure in self.figures:
+            rect = pygame.Rect(figure.x, figure.y, figure.width, figure.height)
+            if figure.render_thread is not None:
+                # rendered on its own thread. front buffer is blitted holding the render condition, since the worker copies to it
+                with figure.render_condition:
+                    figure._request_render()
+                    if self._needs_blit(figure, ('threaded', figure.shown_version), rect, dirty):
+                        self.screen.blit(figure.front, rect)
+                continue
+            profiler = figure.profiler
+            if profiler is not None:
+                profiler.start_frame()
+            with figure.lock:
+                figure.redrawn_areas = figure._render()
+            if self._needs_blit(figure, figure.drawn_state, rect, dirty):
+                batch.append((figure.background, rect))
+            if profiler is not None:
+                # blit phase is not timed, figures are blitted together
+                profiler.end_frame()
+
+        if batch:
+            self.screen.blits(batch, False)
+        for figure in overlays:
+            figure.profiler.draw_overlay(self.screen, (figure.x + PADDING, figure.y + PADDING))
+        if filled:
+            dirty = [self.screen.get_rect()]
+        self.dirty_rects = dirty
+        return dirty
+
+    def _needs_blit(self, figure, state, rect, dirty):
+        # True if figure changed since it was last blitted. a figure with profiler overlay is blitted in every frame to cover
+        # former overlay
+        blitted = self.blitted.get(figure)
+        if blitted == (state, rect) and not figure.profiler_overlay:
+            return False
+        if blitted is not None and blitted[1] != rect:
+            # figure moved or resized
+            self.screen.fill(self.bg_color, blitted[1])
+            dirty.append(blitted[1])
+        dirty.append(rect)
+        self.blitted[figure] = (state, rect)
+        return True
+
+    def update_display(self):
+        '''
+        Updates only the rects changed in last draw on the display
+        '''
+        if self.dirty_rects:
+            pygame.display.update(self.dirty_rects)
+
+
+class PanZoom:
+    '''
+    Mouse control of x-axis limits for a figure with numeric xdata. Dragging with left button pans, mouse wheel zooms around
+    the cursor and right click shows all data again. Events of the game loop are passed to handle_event. Visible points of
+    sorted xdata are found with binary search, so cost of each frame depends on the number of visible points only
+    figure:     Figure
+    zoom_step:  number  Ratio of x-axis range zoomed by one step of mouse wheel. Default = ZOOM_STEP in settings.py
+    '''
+    def __init__(self, figure, zoom_step=ZOOM_STEP):
+        self.figure = figure
+        self.zoom_step = zoom_step
+        # (mouse x, xmin, xmax) at the start of dragging
+        self.drag = None
+
+    def _plot_rect(self):
+        # chart area on the screen
+        chart_area = self.figure.chart_area
+        return pygame.Rect(self.figure.x + chart_area.x, self.figure.y + chart_area.y, chart_area.width, chart_area.height)
+
+    def _xdata_at(self, screen_x):
+        # x value under a horizontal screen position, as drawn in last frame
+        chart_area = self.figure.chart_area
+        return chart_area.xdata_min + (screen_x - self.figure.x - chart_area.x - chart_area.chart_margin) / chart_area.xdata_gap
+
+    def _active(self):
+        chart_area = self.figure.chart_area
+        return chart_area.xdata_type == 'numeric' and chart_area.xdata_min is not None and chart_area.xdata_gap
+
+    def handle_event(self, event):
+        '''
+        Pans or zooms the figure for mouse events over its chart area. Returns True if the event is used
+        '''
+        if not self._active():
+            return False
+        chart_area = self.figure.chart_area
+        if event.type == pygame.MOUSEBUTTONDOWN and self._plot_rect().collidepoint(event.pos):
+            if event.button == 1:
+                self.drag = (event.pos[0], chart_area.xdata_min, chart_area.xdata_max)
+                return True
+            elif event.button == 3:
+                self.figure.reset_xlim()
+                return True
+        elif event.type == pygame.MOUSEMOTION and self.drag is not None:
+            start, xmin, xmax = self.drag
+            shift = (event.pos[0] - start) / chart_area.xdata_gap
+            self.figure.set_xlim((float(xmin - shift), float(xmax - shift)))
+            return True
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 1 and self.drag is not None:
+            self.drag = None
+            return True
+        elif event.type == pygame.MOUSEWHEEL:
+            position = pygame.mouse.get_pos()
+            if not self._plot_rect().collidepoint(position):
+                return False
+            center = self._xdata_at(position[0])
+            ratio = (1 - self.zoom_step) ** event.y
+            xmin = center + (chart_area.xdata_min - center) * ratio
+            xmax = center + (chart_area.xdata_max - center) * ratio
+            if xmax > xmin:
+                self.figure.set_xlim((float(xmin), float(xmax)))
+            return True
+        return False
 
 
-    
 class Area:
     '''
     Base object for figure areas: title, legend, x-y axis labels, x-y axis ticks and chart area
+    Areas and their subclasses declare their attributes in __slots__
     '''
+    __slots__ = ('figure', 'x', 'y', 'width', 'height', 'innerx', 'innery', 'innerwidth', 'innerheight', 'show', 'rect', 'layer',
+                 'layer_rect', 'layer_signature')
+
     def __init__(self, figure):
         self.figure = figure
         self.x = 0
@@ -308,6 +1216,13 @@ class Area:
         self.innerwidth = 0
         self.innerheight = 0
         self.show = 0
+        # rect of the area on its layer, updated in place when the area is drawn
+        self.rect = pygame.Rect(0, 0, 0, 0)
+        # cached rendering of the area. layer_rect is the position and size of layer on figure background and layer_signature
+        # keeps the inputs the layer is rendered with
+        self.layer = None
+        self.layer_rect = pygame.Rect(0, 0, 0, 0)
+        self.layer_signature = None
 
     def _adjust_inner_area(self):
         # in order to provide a padding for the area, there are inner and outer areas. this method adjusts inner area acc to outer area
@@ -324,23 +1239,70 @@ class Area:
         self.height = self.innerheight + PADDING * 2
 
     def draw_area(self):
-        # draw the area with the same background color of figure. useful for hiding chart drawings out of figure data limits
+        # draw the area on figure background with the same background color of figure. the area is covered again when its layer
+        # is composed in a draw
         if self.show:
-            self.rect = pygame.Rect(self.x, self.y, self.width, self.height)
-            pygame.draw.rect(self.figure.background, self.figure.bg_color, self.rect)
+            pygame.draw.rect(self.figure.background, self.figure.bg_color, pygame.Rect(self.x, self.y, self.width, self.height))
 
     def draw_area_border(self): 
-        # draw the area with border and no fill color
+        # draw the area on figure background with border and no fill color
+        if self.show:
+            pygame.draw.rect(self.figure.background, (0,0,0), pygame.Rect(self.x, self.y, self.width, self.height), width=1)
+
+    def _fill_layer_area(self):
+        # fill the area on its layer with the background color of figure, while the layer is rendered
+        if self.show:
+            self.rect.update(self.x - self.layer_rect.x, self.y - self.layer_rect.y, self.width, self.height)
+            pygame.draw.rect(self.layer, self.figure.bg_color, self.rect)
+
+    def _draw_layer_border(self):
+        # draw the border of the area on its layer, while the layer is rendered
+        if self.show:
+            self.rect.update(self.x - self.layer_rect.x, self.y - self.layer_rect.y, self.width, self.height)
+            pygame.draw.rect(self.layer, (0,0,0), self.rect, width=1)
+
+    def _local(self, x, y):
+        # converts a position on figure background to a position on area layer
+        return (x - self.layer_rect.x, y - self.layer_rect.y)
+
+    def _get_layer_rect(self):
+        # position and size of the layer on figure background. might be larger than the area if the content overflows
+        return pygame.Rect(self.x, self.y, self.width, self.height)
+
+    def _signature(self):
+        # inputs of the area content other than its position and size. layer is re-rendered only if these change
+        return None
+
+    def _layer_changed(self):
+        # True if position, size or content of the area changed since the layer was rendered
+        self.layer_rect = self._get_layer_rect()
+        signature = (tuple(self.layer_rect), self.show, self.figure.bg_color, self._signature())
+        if signature == self.layer_signature:
+            return False
+        self.layer_signature = signature
+        return True
+
+    def _render_layer(self):
+        # renders the area on its layer
+        if self.layer is None or self.layer.get_size() != self.layer_rect.size:
+            self.layer = pygame.Surface(self.layer_rect.size)
+        self.layer.fill(self.figure.bg_color)
         if self.show:
-            self.rect = pygame.Rect(self.x, self.y, self.width, self.height)
-            pygame.draw.rect(self.figure.background, (0,0,0), self.rect, width=1)
+            self._draw()
+
+    def _blit_layer(self):
+        if self.show and self.layer is not None:
+            self.figure.background.blit(self.layer, self.layer_rect)
 
 
 
 
 class Title(Area):
+    __slots__ = ('txtOb', 'txt_position')
+
     def __init__(self, figure):
         super().__init__(figure)
+        self.txtOb = None
 
     def add_title(self, title):
         self.txtOb = Text(title, font_size=TITLE_FONT_SIZE)
@@ -354,15 +1316,20 @@ class Title(Area):
         self.height = self.innerheight + PADDING * 2
         self._adjust_inner_area()
 
+    def _signature(self):
+        return self.txtOb.source_text if self.txtOb else None
+
     def _draw(self):
-        self.draw_area()
-        if 'txtOb' in dir(self):
-            self.txt_position = (self.x + self.width / 2, self.y + self.height / 2)
-            self.txtOb.write_fron_textOb(self.figure.background, self.txt_position)
+        self._fill_layer_area()
+        if self.txtOb:
+            self.txt_position = self._local(self.x + self.width / 2, self.y + self.height / 2)
+            self.txtOb.write_fron_textOb(self.layer, self.txt_position)
 
 
 
 class Legend(Area):
+    __slots__ = ('line_height', 'item_width', 'lines')
+
     def __init__(self, figure):
         super().__init__(figure)
         self.line_height = MIN_LEGEND_LINE_HEIGHT
@@ -389,20 +1356,28 @@ class Legend(Area):
         self.lines.append(width)
 
     def _adjust_size_pos(self):
-        self._calculate_line_width_height()
+        # hidden legend takes only the padding, like other hidden areas
+        if self.show:
+            self._calculate_line_width_height()
+        else:
+            self.width = self.figure.width
+            self.lines = [0]
         self.innerwidth = max(self.lines)
-        self.innerheight = self.line_height * len(self.lines)
+        self.innerheight = self.line_height * len(self.lines) if self.show else 0
         self.innerx = (self.figure.width - self.innerwidth) / 2
         self.innery = self.figure.height - (self.innerheight + PADDING)
         self._adjust_outer_area()
 
+    def _signature(self):
+        charts = tuple((chart.name, chart.__class__, tuple(chart.color)) for chart in self.figure.chart_area.charts)
+        return (charts, tuple(self.lines), self.line_height, self.innerx, self.innery)
+
     def _write_legend_items(self):
-        charts = self.figure.chart_area.charts
+        charts = self.figure.chart_area.frame_charts
         i = 0
-        y = self.innery
+        x, y = self._local(self.innerx, self.innery)
         for line_width in self.lines:
             width = 0
-            x = self.innerx
             while width < line_width:
                 chart = charts[i]
                 self._draw_legend_item(chart, (x+ width, y))
@@ -414,33 +1389,45 @@ class Legend(Area):
                 
     def _draw_legend_item(self, chart, pos):
         if chart.__class__ == LineChart:
-            linepos = (pos[0], pos[1] + self.line_height / 2)
-            pygame.draw.aaline(self.figure.background, chart.color, linepos, (linepos[0] + self.item_width, linepos[1]))
+            x = np.array([pos[0], pos[0] + self.item_width], dtype=np.float64)
+            y = np.full(2, pos[1] + self.line_height / 2)
+            polyline_renderer.draw(self.layer, chart.color, x, y, chart.line_width, chart.antialiased)
         elif chart.__class__ == BarChart:
-            pygame.draw.rect(self.figure.background, chart.color, pygame.Rect(pos[0], pos[1], self.item_width, self.line_height))
+            pygame.draw.rect(self.layer, chart.color, pygame.Rect(pos[0], pos[1], self.item_width, self.line_height))
         elif chart.__class__ == ScatterChart:
-            pygame.draw.circle(self.figure.background, chart.color, (pos[0] + self.item_width / 2, pos[1] + self.line_height / 2), 3)
+            sprite = marker_cache.get(chart.marker, 3, chart.color)
+            self.layer.blit(sprite, sprite.get_rect(center=(pos[0] + self.item_width / 2, pos[1] + self.line_height / 2)))
+        elif chart.__class__ == DensityChart:
+            # colormap from left to right
+            colors = self.figure.chart_area._density_colors(chart)
+            gradient = pygame.surfarray.make_surface(colors[np.linspace(0, len(colors) - 1, self.item_width).astype(np.intp)][:, None])
+            self.layer.blit(pygame.transform.scale(gradient, (self.item_width, self.line_height)), pos)
 
 
     def _write_chart_name(self, chart, pos):
         txt = Text(chart.name)
-        txt.write_fron_textOb(self.figure.background, pos, 'center_vertical')
+        txt.write_fron_textOb(self.layer, pos, 'center_vertical')
         return txt.txt.get_width()
 
 
     def _draw(self):
         if self.show:
-            self.draw_area()
-            self.draw_area_border()
+            self._fill_layer_area()
+            self._draw_layer_border()
             self._write_legend_items()
 
 class yAxisLabel(Area):
+    __slots__ = ('txtOb', 'txt_position')
+
     def __init__(self, figure):
         super().__init__(figure)
+        self.txtOb = None
+        self.width = PADDING * 2
 
     def add_label(self, label):
         self.txtOb = Text(label, True)
         self.innerwidth = self.txtOb.txt.get_width()
+        self.width = self.innerwidth + PADDING * 2
 
     def _adjust_size_pos(self):
         self.height = self.figure.height - (self.figure.title.height + self.figure.legend.height + self.figure.xaxis_label.height)
@@ -449,15 +1436,21 @@ class yAxisLabel(Area):
         self.width = self.innerwidth + PADDING * 2
         self._adjust_inner_area()
 
+    def _signature(self):
+        return self.txtOb.source_text if self.txtOb else None
+
     def _draw(self):
-        self.draw_area()
-        if 'txtOb' in dir(self):
-            self.txt_position = (self.x + self.width / 2, self.y + self.height / 2)
-            self.txtOb.write_fron_textOb(self.figure.background, self.txt_position)
+        self._fill_layer_area()
+        if self.txtOb:
+            self.txt_position = self._local(self.x + self.width / 2, self.y + self.height / 2)
+            self.txtOb.write_fron_textOb(self.layer, self.txt_position)
 
 class xAxisLabel(Area):
+    __slots__ = ('txtOb', 'txt_position')
+
     def __init__(self, figure):
         super().__init__(figure)
+        self.txtOb = None
 
     def add_label(self, label):
         self.txtOb = Text(label, False)
@@ -470,182 +1463,473 @@ class xAxisLabel(Area):
         self.y = self.figure.height - (self.figure.legend.height + self.height)
         self._adjust_inner_area()
 
+    def _signature(self):
+        return self.txtOb.source_text if self.txtOb else None
+
     def _draw(self):
-        self.draw_area()
-        if 'txtOb' in dir(self):
-            self.txt_position = (self.x + self.width / 2, self.y + self.height / 2)
-            self.txtOb.write_fron_textOb(self.figure.background, self.txt_position)
+        self._fill_layer_area()
+        if self.txtOb:
+            self.txt_position = self._local(self.x + self.width / 2, self.y + self.height / 2)
+            self.txtOb.write_fron_textOb(self.layer, self.txt_position)
 
 class xAxisTick(Area):
+    __slots__ = ('xmin', 'xmax', 'ticks', 'auto_ticks', 'measured_ticks', 'ticks_height', 'tick_slots', 'selected_for',
+                 'label_widths', 'glyph_advances')
+
     def __init__(self, figure):
         super().__init__(figure)
         self.xmin = None
         self.xmax = None
+        self.ticks = ()
+        # ticks of auto-scaled axis kept with hysteresis, and ticks the height was measured for
+        self.auto_ticks = None
+        self.measured_ticks = None
+        self.ticks_height = 0
+        # for string xdata, positions of the categories shown as ticks, and (category version, plot width) they were selected
+        # for. label_widths keeps the width of each category label, summed from the advances of its glyphs
+        self.tick_slots = range(0)
+        self.selected_for = None
+        self.label_widths = {}
+        self.glyph_advances = {}
     
     def _calculate_ticks_string(self):
-        # calculates string vars from all charts
-        self.ticks = self.figure.chart_area.all_xdata
+        # categories shown as ticks. every k-th category is taken, with k the smallest step keeping the widest label clear of
+        # its neighbours, so labels do not overlap and the number of ticks depends on the width of the axis, not on the number
+        # of categories. selection is repeated only if categories or width change
+        chart_area = self.figure.chart_area
+        plot_width = self.width - PADDING - 2 * chart_area.chart_margin
+        key = (chart_area.category_version, plot_width)
+        if key != self.selected_for:
+            categories = chart_area.all_xdata
+            step = 1
+            if len(categories) > 1:
+                gap = plot_width / (len(categories) - 1)
+                step = max(1, math.ceil((self._max_label_width(categories) + TICK_LABEL_GAP) / gap)) if gap > 0 else len(categories)
+            self.tick_slots = range(0, len(categories), step)
+            self.ticks = tuple(categories[i] for i in self.tick_slots)
+            self.selected_for = key
+        self.auto_ticks = None
+
+    def _max_label_width(self, categories):
+        # width of the widest label. each category is measured once, and each glyph is measured once with the font. widths of
+        # categories no longer in use are dropped once they are the majority
+        widths = self.label_widths
+        new = [category for category in categories if category not in widths]
+        if new:
+            if len(widths) + len(new) > 2 * len(categories):
+                widths = self.label_widths = {category: widths[category] for category in categories if category in widths}
+            advances = self.glyph_advances
+            glyphs = set().union(*new).difference(advances)
+            if glyphs:
+                font = font_registry.get_freetype(None, FONT_SIZE)
+                with text_cache.lock:
+                    for glyph, metrics in zip(glyphs, font.get_metrics(''.join(glyphs))):
+                        advances[glyph] = metrics[4] if metrics else 0
+            for category in new:
+                widths[category] = sum(map(advances.__getitem__, category))
+        return max(widths[category] for category in categories)
     
     def _calculate_ticks_numeric(self): 
         # calculates ticks according to figure limit or provided chart data
         if (self.figure.xmin != None) & (self.figure.xmax != None):
             # if xlim is set on figure level, use these boundaries in tick calculation. later remove any tick outside figure limit
             self.xmin, self.xmax = self.figure.xmin, self.figure.xmax
-            self.ticks = tick_range(self.xmin, self.xmax)
-            self.ticks = [i for i in self.ticks if i>=self.xmin and i<=self.xmax]
+            self.ticks = tuple(i for i in tick_range(self.xmin, self.xmax) if i>=self.xmin and i<=self.xmax)
+            self.auto_ticks = None
         else:
-            # if no xlim is set on figure level, use min/max values from charts.
-            self.xmin, self.xmax = min(self.figure.chart_area.all_xdata), max(self.figure.chart_area.all_xdata)
-            self.ticks = tick_range(self.xmin, self.xmax)
-            self.xmin, self.xmax = min(self.ticks), max(self.ticks)
+            # if no xlim is set on figure level, use min/max values from charts. ticks stay while data changes slightly
+            self.xmin, self.xmax = self.figure.chart_area.all_xdata_min, self.figure.chart_area.all_xdata_max
+            self.ticks = self.auto_ticks = stable_ticks(self.auto_ticks, self.xmin, self.xmax)
+            self.xmin, self.xmax = self.ticks[0], self.ticks[-1]
 
     def _calculate_ticks(self):
         if self.figure.chart_area.xdata_type == 'str':
             self._calculate_ticks_string()
         else:
             self._calculate_ticks_numeric()
+            self.selected_for = None
 
     def _calculate_height(self):
-        # max height of tick text objects
-        txtObs = [Text(str(i)) for i in self.ticks]
-        txtObs_heights = [i.txt.get_height() for i in txtObs]
-        self.height = max(txtObs_heights) + PADDING
-
-    def _write_ticks(self):
-        # first get start position from chart area. then adjust ticks list as [tick, position]
-        if self.figure.chart_area.xdata_type == 'numeric':
-            startpos = self.figure.chart_area.x + self.figure.chart_area.chart_margin
-            self.ticks = [[i, startpos + (i - self.xmin) * self.figure.chart_area.xdata_gap] for i in self.ticks]
+        # max height of tick text objects. texts are measured only if ticks changed
+        if self.ticks != self.measured_ticks:
+            self.ticks_height = max((Text(str(i)).txt.get_height() for i in self.ticks), default=0)
+            self.measured_ticks = self.ticks
+        self.height = self.ticks_height + PADDING
+
+    def _get_layer_rect(self):
+        # tick texts might overflow to the left of the area. layer extends over the empty corner below y-axis ticks
+        x = self.figure.yaxis_label.width
+        return pygame.Rect(x, self.y, self.x + self.width - x, self.height)
+
+    def _signature(self):
+        chart_area = self.figure.chart_area
+        return (self.ticks, self.tick_slots, self.xmin, chart_area.xdata_type, chart_area.x, chart_area.chart_margin, chart_area.xdata_min,
+                chart_area.xdata_gap)
+
+    def _tick_positions(self):
+        # position of each tick on figure background, according to chart area
+        chart_area = self.figure.chart_area
+        startpos = chart_area.x + chart_area.chart_margin
+        if chart_area.frame_xdata_type == 'numeric':
+            return [startpos + (i - self.xmin) * chart_area.xdata_gap for i in self.ticks]
         else:
-            startpos = self.figure.chart_area.x + self.figure.chart_area.chart_margin
-            for i in range(len(self.ticks)):
-                self.ticks[i] = [self.ticks[i], startpos + i * self.figure.chart_area.xdata_gap]
+            return [startpos + (i - chart_area.xdata_min) * chart_area.xdata_gap for i in self.tick_slots]
 
-        # for each [tick, position] couple create a Text object and write center-aligned
-        for tick in self.ticks:
-            tick_txtOb = Text(str(tick[0]))
-            tick_txtOb.write_fron_textOb(self.figure.background, (tick[1], self.y + self.height / 2))
+    def _write_ticks(self):
+        # for each tick and position couple create a Text object and write center-aligned
+        for tick, position in zip(self.ticks, self._tick_positions()):
+            tick_txtOb = Text(str(tick))
+            tick_txtOb.write_fron_textOb(self.layer, self._local(position, self.y + self.height / 2))
 
 
     def _draw(self):
-        self.draw_area()
+        self._fill_layer_area()
         self._write_ticks()
 
 class yAxisTick(Area):
+    __slots__ = ('ymin', 'ymax', 'ticks', 'auto_ticks', 'measured_ticks', 'ticks_width')
+
     def __init__(self, figure):
         super().__init__(figure)
         self.ymin = None
         self.ymax = None
+        self.ticks = ()
+        # ticks of auto-scaled axis kept with hysteresis, and ticks the width was measured for
+        self.auto_ticks = None
+        self.measured_ticks = None
+        self.ticks_width = 0
 
     def _calculate_ticks(self): # should run before drawing charts
         # calculates ticks according to figure limit or provided chart data
         if (self.figure.ymin != None) & (self.figure.ymax != None):
             # if ylim is set on figure level, use these boundaries in tick calculation. later remove any tick outside figure limit
             self.ymin, self.ymax = self.figure.ymin, self.figure.ymax
-            self.ticks = tick_range(self.ymin, self.ymax)
-            self.ticks = [i for i in self.ticks if i>=self.ymin and i<=self.ymax]
+            self.ticks = tuple(i for i in tick_range(self.ymin, self.ymax) if i>=self.ymin and i<=self.ymax)
+            self.auto_ticks = None
         else:
-            # if no ylim is set on figure level, use min/max values from charts.
-            self.ymin, self.ymax = min(self.figure.chart_area.all_ydata), max(self.figure.chart_area.all_ydata)
-            self.ticks = tick_range(self.ymin, self.ymax)
-            self.ymin, self.ymax = min(self.ticks), max(self.ticks)
+            # if no ylim is set on figure level, use min/max values from charts. ticks stay while data changes slightly
+            self.ymin, self.ymax = self.figure.chart_area.all_ydata_min, self.figure.chart_area.all_ydata_max
+            self.ticks = self.auto_ticks = stable_ticks(self.auto_ticks, self.ymin, self.ymax)
+            self.ymin, self.ymax = self.ticks[0], self.ticks[-1]
 
     def _calculate_width(self):
-        # max width of tick text objects
-        txtObs = [Text(str(i)) for i in self.ticks]
-        txtObs_widths = [i.txt.get_width() for i in txtObs]
-        self.width = max(txtObs_widths) + PADDING
+        # max width of tick text objects. texts are measured only if ticks changed
+        if self.ticks != self.measured_ticks:
+            self.ticks_width = max((Text(str(i)).txt.get_width() for i in self.ticks), default=0)
+            self.measured_ticks = self.ticks
+        self.width = self.ticks_width + PADDING
     
-    def _write_ticks(self):
-        # first get start position from chart area. then adjust ticks list as [tick, position]
+    def _signature(self):
+        chart_area = self.figure.chart_area
+        return (self.ticks, self.ymax, chart_area.y, chart_area.chart_margin, chart_area.ydata_multiplier)
+
+    def _tick_positions(self):
+        # position of each tick on figure background, according to chart area
         startpos = self.figure.chart_area.y + self.figure.chart_area.chart_margin
-        self.ticks = [[i, startpos + (self.ymax - i) * self.figure.chart_area.ydata_multiplier] for i in self.ticks]
+        return [startpos + (self.ymax - i) * self.figure.chart_area.ydata_multiplier for i in self.ticks]
 
-        # for each [tick, position] couple create a Text object and write center-aligned
-        for tick in self.ticks:
-            tick_txtOb = Text(str(tick[0]))
-            tick_txtOb.write_fron_textOb(self.figure.background, (self.x + self.width / 2, tick[1]))
+    def _write_ticks(self):
+        # for each tick and position couple create a Text object and write center-aligned
+        for tick, position in zip(self.ticks, self._tick_positions()):
+            tick_txtOb = Text(str(tick))
+            tick_txtOb.write_fron_textOb(self.layer, self._local(self.x + self.width / 2, position))
 
     def _draw(self):
-        self.draw_area()
+        self._fill_layer_area()
         self._write_ticks()
     
 class ChartArea(Area):
+    __slots__ = ('charts', 'series', 'chart_margin', 'xdata_type', 'gridlines', 'data_version', 'category_order', 'category_codes',
+                 'categories', 'free_codes', 'sorted_categories', 'category_counts', 'category_slots', 'all_xdata', 'category_version',
+                 'bar_mode', 'bar_sprites', 'frame_charts', 'frame_sources', 'frame_xdata_type',
+                 'all_xdata_min', 'all_xdata_max', 'all_ydata_min', 'all_ydata_max', 'xdata_min', 'xdata_max', 'xdata_gap',
+                 'ydata_min', 'ydata_max', 'ydata_multiplier')
+
     def __init__(self, figure):
         super().__init__(figure)
+        # charts in draw order, and registry of the same charts by name
         self.charts = []
-        self.chart_names = []
+        self.series = {}
         self.chart_margin = CHART_MARGIN
         self.xdata_type = None
         self.gridlines = 0
-
-    def _check_xdata(self, chart):
+        # increased whenever a chart is added or chart data changes
+        self.data_version = 0
+        # persistent index of categories for string xdata. each category in use has a code, which does not change while its
+        # points are in any chart. charts keep codes of their xdata and category_counts the number of points of each code.
+        # a category without points gives its code to free_codes for the next new category, so the index does not grow
+        # with the history of a windowed series. category_codes keeps categories in use in order of appearance, and
+        # sorted_categories in sorted order if category_order is 'sorted'
+        self.category_order = 'sorted'
+        self.category_codes = {}
+        self.categories = []
+        self.free_codes = []
+        self.sorted_categories = []
+        self.category_counts = np.zeros(0, dtype=np.int64)
+        # category_slots maps codes to positions on x-axis and all_xdata is the categories in position order. both are
+        # calculated in the next draw after the categories in use change, None until then
+        self.category_slots = np.zeros(0, dtype=np.int64)
+        self.all_xdata = None
+        # increased whenever the categories in use change
+        self.category_version = 0
+        # 'overlap', 'group' or 'stack' for multiple bar charts
+        self.bar_mode = 'overlap'
+        self.bar_sprites = {}
+        # charts and type of xdata the layers are drawn with, taken holding the figure lock. for threaded rendering, charts are
+        # copies with their data as of then, frame_sources are the charts they are copied from
+        self.frame_charts = []
+        self.frame_sources = []
+        self.frame_xdata_type = None
+
+    @property
+    def chart_names(self):
+        return list(self.series)
+
+    def _check_xdata(self, xdata_type):
         # checks if provided xdata is aligned with previously provided charts. cannot draw multiple charts with one numberic and one string
         # xdata. also, if figure.xlim is porvided (must be number) no categoric data can be drawn
+        if xdata_type is None:
+            # chart without data yet
+            return
         if self.xdata_type:
-            if self.xdata_type != chart.xdata_type:
+            if self.xdata_type != xdata_type:
                 raise KeyError('All charts must have the same type for xdata!')
         else:
-            self.xdata_type = chart.xdata_type
+            self.xdata_type = xdata_type
 
     def _add_chart(self, chart):
         # chart object can be any extension of ChartType object. chart-name is handy here since just appending charts create abundance of
-        # duplicates in game loop. therefore, in each step, checks if the chart already exists. if so, updates chart
-        if chart.name not in self.chart_names:
-            self._check_xdata(chart)
-            self.charts.append(chart)
-            self.chart_names.append(chart.name)
-        else:
-            self._update_chart(chart)
-
-    def _update_chart(self, chart):
-        # find the chart over unique name and update xdata and ydata
-        chart_to_update = [i for i in self.charts if i.name == chart.name][0]
-        if chart_to_update is None:
+        # duplicates in game loop. Figure updates existing charts over _update_chart without creating a chart object, a chart added
+        # with the name of an existing one updates its data
+        if chart.name in self.series:
+            self._update_chart(chart.name, chart.xdata, chart.ydata, trusted=True)
+            return
+        self._check_xdata(chart.xdata_type)
+        self._set_category_codes(chart, chart.xdata)
+        self.charts.append(chart)
+        self.series[chart.name] = chart
+        self._data_changed()
+
+    def _update_chart(self, name, xdata, ydata, trusted=False):
+        # find the chart over unique name and update xdata and ydata in place. same data provided in every game loop is not a change
+        chart = self.series.get(name)
+        if chart is None:
             raise KeyError('No existing chart with the same name to update!')
-        self._check_xdata(chart)
-        chart_to_update.xdata = chart.xdata
-        chart_to_update.ydata = chart.ydata
+        xdata_type, xdata, ydata = chart._convert_data(xdata, ydata, trusted)
+        self._check_xdata(xdata_type)
+        if not (data_equal(chart.xdata, xdata) and data_equal(chart.ydata, ydata)):
+            chart._set_arrays(xdata_type, xdata, ydata)
+            self._set_category_codes(chart, chart.xdata)
+            self._data_changed()
+
+    def _remove_chart(self, name):
+        # remove chart with the name. its points are no longer counted for categories
+        chart = self.series.pop(name, None)
+        if chart is None:
+            raise KeyError('No existing chart with the same name to remove!')
+        self.charts.remove(chart)
+        if chart.xcodes is not None:
+            self._count_categories(np.zeros(0, dtype=np.int64), chart.xcodes.data)
+        self._reset_xdata_type()
+        self._data_changed()
+
+    def _clear_charts(self):
+        # remove all charts and forget all categories
+        self.charts = []
+        self.series = {}
+        self.category_codes = {}
+        self.categories = []
+        self.free_codes = []
+        self.sorted_categories = [] if self.category_order == 'sorted' else None
+        self.category_counts = np.zeros(0, dtype=np.int64)
+        self._categories_changed()
+        self._reset_xdata_type()
+        self._data_changed()
+
+    def _reset_xdata_type(self):
+        # type of xdata is free again when no chart has data, unless figure.xlim is set
+        if self.figure.xmin is None and all(chart.xdata_type is None for chart in self.charts):
+            self.xdata_type = None
+
+    def _extend_chart(self, name, xdata, ydata, trusted=False):
+        # append points to chart with the name
+        chart = self.series.get(name)
+        if chart is None:
+            raise KeyError('No existing chart with the same name to append!')
+        xdata_type, xdata, ydata = chart._convert_data(xdata, ydata, trusted)
+        if not len(xdata):
+            return
+        # points are checked against the figure before the chart is changed, a failed append leaves the figure as it was
+        self._check_xdata(xdata_type)
+        length = len(chart.xdata)
+        chart._extend_arrays(xdata_type, xdata, ydata)
+        if chart.xcodes is None:
+            self._set_category_codes(chart, chart.xdata)
+        elif chart.xdata_type == 'str':
+            # codes of new points still in the window and of old points pushed out by them
+            new = min(len(xdata), len(chart.xdata))
+            removed = min(length + len(xdata) - len(chart.xdata), length)
+            removed = chart.xcodes.data[:removed].copy()
+            codes = self._encode_categories(chart.xdata[len(chart.xdata) - new:])
+            chart.xcodes.extend(codes)
+            self._count_categories(codes, removed)
+        self._data_changed()
+
+    def _encode_categories(self, xdata):
+        # codes of categories. a new category takes a free code, or the next one. counts grow by doubling
+        category_codes = self.category_codes
+        new = [category for category in dict.fromkeys(xdata) if category not in category_codes]
+        if new:
+            categories, free_codes, sorted_categories = self.categories, self.free_codes, self.sorted_categories
+            for category in new:
+                if free_codes:
+                    code = free_codes.pop()
+                    categories[code] = category
+                else:
+                    code = len(categories)
+                    categories.append(category)
+                category_codes[category] = code
+                if sorted_categories is not None:
+                    insort(sorted_categories, category)
+            if len(categories) > len(self.category_counts):
+                counts = np.zeros(max(2 * len(self.category_counts), len(categories), 16), dtype=np.int64)
+                counts[:len(self.category_counts)] = self.category_counts
+                self.category_counts = counts
+            self._categories_changed()
+        return np.fromiter(map(category_codes.__getitem__, xdata), np.int64, len(xdata))
+
+    def _set_category_codes(self, chart, xdata):
+        # replaces category codes of chart for string xdata
+        if chart.xdata_type != 'str':
+            return
+        removed = chart.xcodes.data if chart.xcodes is not None else np.zeros(0, dtype=np.int64)
+        codes = self._encode_categories(xdata)
+        chart.xcodes = SeriesBuffer(codes, chart.max_points, extrema=False)
+        self._count_categories(codes, removed)
+
+    def _count_categories(self, added, removed):
+        # number of points for each category. categories left without points are removed from the index. cost depends on the
+        # number of points added and removed, not on the number of categories
+        counts = self.category_counts
+        np.add.at(counts, added, 1)
+        np.subtract.at(counts, removed, 1)
+        if len(removed):
+            removed = np.unique(removed)
+            unused = removed[counts[removed] == 0]
+            if len(unused):
+                self._free_categories(unused.tolist())
+
+    def _free_categories(self, codes):
+        # categories of codes are no longer in use, their codes are given to new categories
+        categories, sorted_categories = self.categories, self.sorted_categories
+        for code in codes:
+            category = categories[code]
+            del self.category_codes[category]
+            categories[code] = None
+            if sorted_categories is not None:
+                del sorted_categories[bisect_left(sorted_categories, category)]
+        self.free_codes.extend(codes)
+        self._categories_changed()
+
+    def _categories_changed(self):
+        # positions are calculated again in the next draw
+        self.all_xdata = None
+        self.category_version += 1
+
+    def _update_category_slots(self):
+        # positions of categories in use on x-axis, in order of first appearance or sorted. new arrays are created, the ones
+        # of the previous frame are not changed
+        ordered = self.sorted_categories if self.sorted_categories is not None else self.category_codes
+        self.all_xdata = list(ordered)
+        codes = np.fromiter(map(self.category_codes.__getitem__, self.all_xdata), np.int64, len(self.all_xdata))
+        slots = np.full(len(self.categories), -1, dtype=np.int64)
+        slots[codes] = np.arange(len(codes))
+        self.category_slots = slots
+
+    def _take_frame(self, copy_charts):
+        # with copy_charts, layers can be drawn while methods of figure change the charts on another thread
+        self.frame_xdata_type = self.xdata_type
+        if copy_charts:
+            self.frame_sources = list(self.charts)
+            self.frame_charts = [chart._frame() for chart in self.charts]
+        else:
+            self.frame_charts = self.charts
+
+    def _keep_frame(self):
+        # caches calculated while drawing copies of charts are kept by the charts. runs holding the figure lock
+        for chart, frame in zip(self.frame_sources, self.frame_charts):
+            chart._keep_caches(frame)
+        self.frame_charts = []
+        self.frame_sources = []
+
+    def _data_changed(self):
+        self.data_version += 1
+        self.figure._changed()
+
+    def _signature(self):
+        # chart drawings depend on data, data to pixel conversion and the gridlines layer below them
+        return (
+            self.data_version, self.xdata_type, self.chart_margin, self.bar_mode,
+            self.xdata_min, self.xdata_max, self.xdata_gap, self.ydata_max, self.ydata_multiplier,
+            self.figure.gridlines.layer_signature,
+        )
 
     def _draw(self):
-        self.draw_area_border()
+        # gridlines layer is the base of chart area layer
+        if self.gridlines:
+            self.layer.blit(self.figure.gridlines.layer, (0, 0))
+        self._draw_all_charts()
+        self._draw_layer_border()
 
     def _combine_xdata(self):
-        # combines all xdata from all charts
-        self.all_xdata = []
-        for chart in self.charts:
-            self.all_xdata += chart.xdata
-        if self.xdata_type == 'str':
-            self.all_xdata = list(set(self.all_xdata))
-            self.all_xdata.sort()
+        # min/max of xdata from running extrema of charts. unless xdata is numeric, positions of categories are calculated if
+        # the categories in use changed
+        if self.xdata_type != 'str':
+            self.all_xdata_min, self.all_xdata_max = self._combine_extrema([chart.xbuffer for chart in self.charts])
+        if self.xdata_type != 'numeric' and self.all_xdata is None:
+            self._update_category_slots()
 
     def _combine_ydata(self):
-        # combines all ydata from all charts
-        self.all_ydata = []
-        for chart in self.charts:
-            self.all_ydata += chart.ydata
-        self.all_ydata = list(set(self.all_ydata))
-        self.all_ydata.sort()
+        # min/max of ydata from running extrema of charts. stacked bars also include the stack heights
+        self.all_ydata_min, self.all_ydata_max = self._combine_extrema([chart.ybuffer for chart in self.charts])
+        if self.bar_mode == 'stack':
+            bars = [chart for chart in self.charts if chart.__class__ == BarChart and len(chart.ydata)]
+            if bars:
+                xdata = [chart.xcodes.data if chart.xdata_type == 'str' else chart.xdata for chart in bars]
+                _, positive, negative = self._stack_bases([(x, chart.ydata) for x, chart in zip(xdata, bars)])
+                self.all_ydata_min = min(self.all_ydata_min, float(negative.min()))
+                self.all_ydata_max = max(self.all_ydata_max, float(positive.max()))
+
+    def _combine_extrema(self, buffers):
+        # O(number of charts). charts without data yet are drawn on default axis (0, 1)
+        mins = [buffer.min for buffer in buffers if buffer.min is not None]
+        maxs = [buffer.max for buffer in buffers if buffer.max is not None]
+        if not mins:
+            return 0.0, 1.0
+        return min(mins), max(maxs)
 
     def _combine_data(self):
         self._combine_xdata()
         self._combine_ydata()
 
     def _find_xdata_gap_numeric(self):
-        self._combine_xdata()
         # calcualte xmin/xmax for chart area. Hieararchy: figure level > xticks > xdata
         if (self.figure.xmin != None) & (self.figure.xmax != None):
             self.xdata_min, self.xdata_max = self.figure.xmin, self.figure.xmax
         elif (self.figure.xaxis_tick.xmin != None) & (self.figure.xaxis_tick.xmax != None):
             self.xdata_min, self.xdata_max = self.figure.xaxis_tick.xmin, self.figure.xaxis_tick.xmax
         else:
-            self.xdata_min, self.xdata_max = min(self.all_xdata), max(self.all_xdata)
+            self.xdata_min, self.xdata_max = self.all_xdata_min, self.all_xdata_max
 
         self.xdata_gap = (self.width - 2 * self.chart_margin) / (self.xdata_max - self.xdata_min)
 
     def _find_xdata_gap_string(self): # instead of set + sort, category names might be sorted acc to introduction of data
-        self._combine_xdata()
-        self.xdata_gap = (self.width - 2 * self.chart_margin) / (len(self.all_xdata) - 1)
+        # categories are positioned by their index. a single category is centered, like a single numeric value
+        if len(self.all_xdata) > 1:
+            self.xdata_min, self.xdata_max = 0, len(self.all_xdata) - 1
+        else:
+            self.xdata_min, self.xdata_max = -1, 1
+        self.xdata_gap = (self.width - 2 * self.chart_margin) / (self.xdata_max - self.xdata_min)
 
     def _find_ydata_multiplier(self):
         # calcualte ymin/ymax for chart area. Hieararchy: figure level > yticks > ydata
@@ -654,7 +1938,7 @@ class ChartArea(Area):
         elif (self.figure.yaxis_tick.ymin != None) & (self.figure.yaxis_tick.ymax != None):
             self.ydata_min, self.ydata_max = self.figure.yaxis_tick.ymin, self.figure.yaxis_tick.ymax
         else:
-            self.ydata_min, self.ydata_max = min(self.all_ydata), max(self.all_ydata)
+            self.ydata_min, self.ydata_max = self.all_ydata_min, self.all_ydata_max
 
         self.ydata_multiplier = (self.height - 2 * self.chart_margin) / (self.ydata_max - self.ydata_min)
 
@@ -665,166 +1949,686 @@ class ChartArea(Area):
             self._find_xdata_gap_string()
         self._find_ydata_multiplier()
 
-    def _adjust_data_for_line_scatter(self, chart):
-        # data is a list of tuples for xdata and ydata
-        data = list(zip(chart.xdata, chart.ydata))
-        data = [list(point) for point in data]
-        
-        if self.xdata_type == 'numeric':
+    def _visible_data(self, chart, boundary=False):
+        # xdata and ydata of the points within x-axis boundaries. categories are replaced with their index. for sorted xdata,
+        # visible points are a slice found with binary search and boundary adds the nearest point out of each side, so that
+        # lines reach the edges of chart area
+        if self.frame_xdata_type == 'numeric':
+            xdata, ydata = chart.xdata, chart.ydata
+            if chart.x_sorted:
+                start = int(np.searchsorted(xdata, self.xdata_min, 'left'))
+                end = int(np.searchsorted(xdata, self.xdata_max, 'right'))
+                if boundary:
+                    start, end = max(start - 1, 0), min(end + 1, len(xdata))
+                return xdata[start:end], ydata[start:end]
             # remove points outside of x-axis boundaries. if figure.xlim is set, self.xdata_min/max = figure.xmin/max
-            data = [point for point in data if (point[0] >= self.xdata_min) & (point[0] <= self.xdata_max)]
-            for point in data:
-                point[0] = (point[0] - self.xdata_min) * self.xdata_gap
-                # distance of end point to top of the chart (ydata_max)
-                point[1] = (self.ydata_max - point[1]) * self.ydata_multiplier
+            mask = (xdata >= self.xdata_min) & (xdata <= self.xdata_max)
+            return xdata[mask], ydata[mask]
+        elif chart.xcodes is None:
+            # chart without data has no category codes yet
+            return np.zeros(0), np.zeros(0)
         else:
-            for point in data:
-                point[0] = self.all_xdata.index(point[0]) * self.xdata_gap
-                # distance of end point to top of the chart (ydata_max)
-                point[1] = (self.ydata_max - point[1]) * self.ydata_multiplier
-        
-        return data
+            return self.category_slots[chart.xcodes.data].astype(np.float64), chart.ydata
+
+    def _downsampled_data(self, chart):
+        # level of detail stage for line charts. if visible points exceed the point budget of the chart, only first, min, max and
+        # last points of each column are kept. with one column per pixel, drawn shape is the same as the full data. result is
+        # cached per data version, x-axis boundaries and chart width, so unchanged frames and y-axis changes reuse it
+        if self.frame_xdata_type != 'numeric':
+            return self._visible_data(chart, boundary=True)
+        plot_width = max(int(self.width - 2 * self.chart_margin), 1)
+        budget = chart.point_budget if chart.point_budget is not None else LOD_POINTS_PER_COLUMN * plot_width
+        key = (chart.version, self.xdata_min, self.xdata_max, plot_width, budget)
+        if chart.lod_cache is not None and chart.lod_cache[0] == key:
+            return chart.lod_cache[1]
+
+        xdata, ydata = self._visible_data(chart, boundary=True)
+        if budget and len(xdata) > budget and (chart.x_sorted or is_sorted(xdata)):
+            columns = min(max(budget // LOD_POINTS_PER_COLUMN, 1), plot_width)
+            column = ((xdata - self.xdata_min) * (columns / (self.xdata_max - self.xdata_min))).astype(np.int64)
+            keep = minmax_indices(column, ydata)
+            xdata, ydata = xdata[keep], ydata[keep]
+        chart.lod_cache = (key, (xdata, ydata))
+        return xdata, ydata
+
+    def _plot_rect(self):
+        # rect of x and y-axis ranges on the layer. lines and bars are clipped to it
+        x0, y0 = self._local(self.x + self.chart_margin, self.y + self.chart_margin)
+        return pygame.Rect(x0, y0, math.ceil((self.xdata_max - self.xdata_min) * self.xdata_gap) + 1,
+                           math.ceil((self.ydata_max - self.ydata_min) * self.ydata_multiplier) + 1)
+
+    def _adjust_data_for_line_scatter(self, chart, data=None):
+        # pixel positions of points as two arrays, x and y. data is (xdata, ydata) to be used instead of visible chart data
+        xdata, ydata = data if data is not None else self._visible_data(chart)
+        x = (xdata - self.xdata_min) * self.xdata_gap
+        # distance of points to top of the chart (ydata_max)
+        y = (self.ydata_max - ydata) * self.ydata_multiplier
+        return x, y
 
 
     def _draw_line(self, chart):
-        data = self._adjust_data_for_line_scatter(chart)
-
-        x = self.x + self.chart_margin
-        y = self.y + self.chart_margin
-        for i in range(len(data) - 1):
-            pygame.draw.aaline(
-                self.figure.background,
-                chart.color,
-                (x + data[i][0], y + data[i][1]),
-                (x + data[i+1][0], y + data[i+1][1]),
-                chart.line_width
-            )
+        # visible polyline is drawn in bulk for each part within y-axis range. segments out of the range are culled and
+        # segments crossing it are cut at its bounds. clip area of the layer cuts segments to boundary points at the edges of
+        # x-axis range, leaving room for half of the line width
+        x, y = self._adjust_data_for_line_scatter(chart, self._downsampled_data(chart))
+        plot = self._plot_rect()
+        parts = clip_polyline(x, y, 0, (self.ydata_max - self.ydata_min) * self.ydata_multiplier)
+        clip = self.layer.get_clip()
+        self.layer.set_clip(plot.inflate(2 * math.ceil(chart.line_width / 2), 2 * math.ceil(chart.line_width / 2)))
+        for x, y in parts:
+            polyline_renderer.draw(self.layer, chart.color, x + plot.x, y + plot.y, chart.line_width, chart.antialiased)
+        self.layer.set_clip(clip)
 
     def _draw_scatter(self, chart):
-        data = self._adjust_data_for_line_scatter(chart)
-        x = self.x + self.chart_margin
-        y = self.y + self.chart_margin
-        for i in range(len(data)):
-            pygame.draw.circle(
-                self.figure.background, 
-                chart.color, 
-                (x + data[i][0], y + data[i][1]), 
-                chart.radius
-                )
-
-    def _adjust_data_for_bar(self, chart):
-        data = list(zip(chart.xdata, chart.ydata))
-        data = [list(point) for point in data]
-
-        if self.xdata_type == 'numeric':
-            # remove points outside of x-axis boundaries. if figure.xlim is set, self.xdata_min/max = figure.xmin/max
-            data = [point for point in data if (point[0] >= self.xdata_min) & (point[0] <= self.xdata_max)]
-            for point in data:
-                point[0] = (point[0] - self.xdata_min) * self.xdata_gap
-                # height of the bar (includes negative values)
-                point[1] = point[1] * self.ydata_multiplier
+        # marker sprite is stamped for all points in one blits call
+        x, y = self._adjust_data_for_line_scatter(chart)
+        # points out of y-axis range are culled
+        visible = (y >= 0) & (y <= (self.ydata_max - self.ydata_min) * self.ydata_multiplier)
+        x, y = x[visible], y[visible]
+        sprite = marker_cache.get(chart.marker, chart.radius, chart.color)
+        x0, y0 = self._local(self.x + self.chart_margin - chart.radius, self.y + self.chart_margin - chart.radius)
+        x = np.floor(x + x0).astype(np.int64)
+        y = np.floor(y + y0).astype(np.int64)
+
+        # skip markers out of the layer. markers on the same pixel are stamped once
+        width, height = self.layer.get_size()
+        size = sprite.get_width()
+        inside = (x > -size) & (x < width) & (y > -size) & (y < height)
+        x, y = x[inside], y[inside]
+        if len(x) > SCATTER_DEDUPLICATE_POINTS:
+            stride = width + size
+            occupied = np.zeros(stride * (height + size), dtype=bool)
+            occupied[(y + size) * stride + x + size] = True
+            y, x = np.divmod(np.flatnonzero(occupied), stride)
+            x, y = x - size, y - size
+
+        self.layer.blits(zip(repeat(sprite), zip(x.tolist(), y.tolist())), doreturn=False)
+
+    def _density_colors(self, chart):
+        # color lookup table of density chart with 255 colors, index 0 of the palette is kept for empty bins. default colormap
+        # fades from figure background to chart color
+        stops = chart.colormap
+        if stops is None:
+            low = tuple(b + (c - b) * DENSITY_MIN_SHADE for c, b in zip(chart.color, self.figure.bg_color))
+            stops = [low, chart.color]
+        key = tuple(tuple(stop) for stop in stops)
+        if chart.colors is None or chart.colors[0] != key:
+            chart.colors = (key, colormap_lut(stops, 255))
+        return chart.colors[1]
+
+    def _density_histogram(self, chart, bins):
+        # counts of points within axis ranges for each bin, as [x, y] array with y from the top. points are counted again only if
+        # bins or axis ranges change, or data is replaced. otherwise appended points are added, and points pushed out of the
+        # window of max_points are subtracted with the bins kept for the points in the window, like category counts
+        key = (self.xdata_min, self.xdata_max, self.ydata_min, self.ydata_max, bins)
+        windowed = chart.max_points is not None
+        # points added since data was set
+        added = chart.xbuffer.count if windowed else len(chart.xdata)
+        new = added - chart.binned
+        size = bins[0] * bins[1]
+        if chart.histogram_key != key or new < 0 or (windowed and new > chart.max_points):
+            chart.histogram = np.zeros(bins, dtype=np.int64)
+            if windowed:
+                # bins of all points in the window, in window order
+                codes = self._density_codes(chart.xdata, chart.ydata, bins)
+                chart.bin_codes = SeriesBuffer(codes, chart.max_points, extrema=False)
+            else:
+                codes = self._density_codes(*self._visible_data(chart), bins)
         else:
-            for point in data:
-                point[0] = self.all_xdata.index(point[0]) * self.xdata_gap
-                # height of the bar (includes negative values)
-                point[1] = point[1] * self.ydata_multiplier
-        
-        return data
-
-    def _draw_bar(self, chart):
-        data = self._adjust_data_for_bar(chart)
-
-        x = self.x + self.chart_margin
-        y = self.y + self.chart_margin + self.ydata_max * self.ydata_multiplier # position of 0 on y-axis
-        if chart.bar_width == None:
-            chart.bar_width = self.xdata_gap/3*2
-
-        for i in range(len(data)):
-            pygame.draw.rect(
-                self.figure.background, 
-                chart.color, 
-                pygame.Rect(
-                    x + data[i][0] - chart.bar_width / 2, 
-                    y - data[i][1] if data[i][1]>=0 else y, # start from data above 0-point for positive values, at 0-point for negative values
-                    chart.bar_width, 
-                    abs(data[i][1]) + 1 # handle both positive and negative values
-                    )
+            start = len(chart.xdata) - new
+            codes = self._density_codes(chart.xdata[start:], chart.ydata[start:], bins)
+            if windowed:
+                removed = chart.bin_codes.data[:max(len(chart.bin_codes.data) + new - chart.max_points, 0)]
+                removed = removed[removed >= 0]
+                if len(removed):
+                    chart.histogram -= np.bincount(removed, minlength=size).reshape(bins)
+                chart.bin_codes.extend(codes)
+        chart.histogram_key = key
+        chart.binned = added
+
+        codes = codes[codes >= 0]
+        if len(codes):
+            chart.histogram += np.bincount(codes, minlength=size).reshape(bins)
+        return chart.histogram
+
+    def _density_codes(self, xdata, ydata, bins):
+        # flat index of the bin of each point, -1 for points out of axis ranges
+        codes = np.full(len(xdata), -1, dtype=np.int64)
+        inside = (xdata >= self.xdata_min) & (xdata <= self.xdata_max) & (ydata >= self.ydata_min) & (ydata <= self.ydata_max)
+        if inside.any():
+            nx, ny = bins
+            # points on the upper bounds belong to the last bins
+            ix = np.minimum(((xdata[inside] - self.xdata_min) * (nx / (self.xdata_max - self.xdata_min))).astype(np.int64), nx - 1)
+            iy = np.minimum(((self.ydata_max - ydata[inside]) * (ny / (self.ydata_max - self.ydata_min))).astype(np.int64), ny - 1)
+            codes[inside] = ix * ny + iy
+        return codes
+
+    def _density_image(self, chart, bins):
+        # 8 bit surface with colormap of the chart as its palette. reused while bins and colors stay the same
+        colors = self._density_colors(chart)
+        key = (bins, chart.colors[0])
+        if chart.image is None or chart.image[0] != key:
+            image = pygame.Surface(bins, depth=8)
+            image.set_palette([(0, 0, 0)] + colors.tolist())
+            image.set_colorkey(0)
+            chart.image = (key, image)
+        return chart.image[1]
+
+    def _draw_density(self, chart):
+        # counts are mapped to palette indices and written to the image of the chart, which is blitted at once. empty bins
+        # have the colorkey, so gridlines stay visible
+        plot = self._plot_rect()
+        size = (max(plot.width - 1, 1), max(plot.height - 1, 1))
+        if chart.bins is None:
+            bins = size
+        elif isinstance(chart.bins, numbers.Integral):
+            bins = (chart.bins, chart.bins)
+        else:
+            bins = tuple(chart.bins)
+        histogram = self._density_histogram(chart, bins)
+        peak = int(histogram.max()) if histogram.size else 0
+        if not peak:
+            return
+        image = self._density_image(chart, bins)
+        # with fewer distinct counts than bins, each count is mapped once and bins look their index up
+        counts = np.arange(peak + 1) if peak < histogram.size else histogram
+        levels = np.log1p(counts) / math.log1p(peak) if chart.log else counts / peak
+        index = (levels * 254).astype(np.uint8) + 1
+        index[counts == 0] = 0
+        pygame.surfarray.blit_array(image, index[histogram] if peak < histogram.size else index)
+        if bins != size:
+            image = pygame.transform.scale(image, size)
+        self.layer.blit(image, plot.topleft)
+
+    def _stack_bases(self, data):
+        # base of each bar for stacked bar charts. data is a list of (xdata, ydata) for each chart. positive and negative values
+        # are stacked separately at each x value. returns bases for each chart with total positive and negative stack heights
+        keys = np.concatenate([xdata for xdata, _ in data])
+        _, inverse = np.unique(keys, return_inverse=True)
+        positive = np.zeros(inverse.max() + 1 if len(inverse) else 0)
+        negative = np.zeros(len(positive))
+        bases = []
+        start = 0
+        for xdata, ydata in data:
+            index = inverse[start:start + len(xdata)]
+            start += len(xdata)
+            bases.append(np.where(ydata >= 0, positive[index], negative[index]))
+            np.add.at(positive, index, np.maximum(ydata, 0))
+            np.add.at(negative, index, np.minimum(ydata, 0))
+        return bases, positive, negative
+
+    def _bar_sprite(self, color):
+        # solid surface of layer size for each color. bars are blitted from its top left corner with their size as area
+        sprite = self.bar_sprites.get(tuple(color))
+        if sprite is None or sprite.get_size() != self.layer.get_size():
+            sprite = self.bar_sprites[tuple(color)] = pygame.Surface(self.layer.get_size())
+            sprite.fill(color)
+        return sprite
+
+    def _adjust_data_for_bar(self, chart, base=None, width=None, offset=0):
+        # rects of bars as arrays of left, top, width and height on the layer. base is the value each bar starts from, 0 if None.
+        # bars are cut at the bounds of y-axis range and bars out of it are culled
+        xdata, ydata = self._visible_data(chart)
+        x0, y0 = self._local(self.x + self.chart_margin, self.y + self.chart_margin + self.ydata_max * self.ydata_multiplier) # position of 0 on y-axis
+        if width is None:
+            width = chart.bar_width if chart.bar_width is not None else self.xdata_gap / 3 * 2
+        top = np.maximum(ydata, 0) if base is None else base + np.maximum(ydata, 0)
+        left = x0 + (xdata - self.xdata_min) * self.xdata_gap + offset - width / 2
+        top = y0 - top * self.ydata_multiplier # start from data above 0-point for positive values, at 0-point for negative values
+        height = np.abs(ydata) * self.ydata_multiplier + 1 # handle both positive and negative values
+        plot = self._plot_rect()
+        bottom = np.minimum(top + height, plot.bottom)
+        top = np.maximum(top, plot.top)
+        visible = bottom > top
+        left, top, height = left[visible], top[visible], (bottom - top)[visible]
+        # bars are at least 1 pixel wide, also when there are more bars than pixels
+        return left.astype(np.int64), top.astype(np.int64), max(int(width), 1), height.astype(np.int64)
+
+    def _draw_bars(self, charts):
+        # all rects of a chart are filled with one blits call. bar width is calculated in each frame from xdata gap unless
+        # provided for the chart. in 'group' mode bars of charts are placed side by side, in 'stack' mode on top of each other
+        if self.bar_mode == 'stack':
+            bases = self._stack_bases([self._visible_data(chart) for chart in charts])[0]
+        else:
+            bases = [None] * len(charts)
+
+        # bars are clipped to y-axis range. bars at the edges of x-axis range may extend into the chart margin
+        clip = self.layer.get_clip()
+        plot = self._plot_rect()
+        self.layer.set_clip(pygame.Rect(1, plot.y, self.layer.get_width() - 2, plot.height))
+
+        for i, chart in enumerate(charts):
+            width, offset = None, 0
+            if self.bar_mode == 'group':
+                width = (chart.bar_width if chart.bar_width is not None else self.xdata_gap / 3 * 2) / len(charts)
+                offset = (i - (len(charts) - 1) / 2) * width
+            left, top, width, height = self._adjust_data_for_bar(chart, bases[i], width, offset)
+            self.layer.blits(
+                zip(repeat(self._bar_sprite(chart.color)), zip(left.tolist(), top.tolist()), zip(repeat(0), repeat(0), repeat(width), height.tolist())),
+                doreturn=False
             )
+        self.layer.set_clip(clip)
 
 
     def _get_certain_chart_type(self, chart_type):
-        return [chart for chart in self.charts if chart.__class__.__name__ == chart_type]
+        return [chart for chart in self.frame_charts if chart.__class__.__name__ == chart_type]
 
 
-    def _draw_all_charts(self):
-        # drawing order: bar, line, scatter
-        # this is not to make latter invisible after the former chart type
-        charts = []
-        for chart_type in ['BarChart','LineChart','ScatterChart']:
-            charts += self._get_certain_chart_type(chart_type)
-
+    def _draw_charts(self, charts):
+        # draws line, scatter and density charts one by one
+        profiler = self.figure.profiler
         for chart in charts:
+            if profiler is not None:
+                start = time.perf_counter()
             if chart.__class__ == LineChart:
                 self._draw_line(chart)
-            elif chart.__class__ == BarChart:
-                self._draw_bar(chart)
             elif chart.__class__ == ScatterChart:
                 self._draw_scatter(chart)
+            elif chart.__class__ == DensityChart:
+                self._draw_density(chart)
             else:
                 pass
+            if profiler is not None:
+                profiler.add('chart ' + str(chart.name), start)
 
-    def _draw_vertical_gridlines(self):
-        ticks = self.figure.xaxis_tick.ticks
-        startpos = self.x + self.chart_margin
-        if self.xdata_type == 'numeric':
-            ticks = [startpos + (i - self.figure.xaxis_tick.xmin) * self.xdata_gap for i in ticks]
+    def _draw_all_charts(self):
+        # drawing order: density, bar, line, scatter
+        # this is not to make latter invisible after the former chart type
+        # all bar charts are drawn together, since grouped and stacked bars depend on each other
+        profiler = self.figure.profiler
+        self._draw_charts([chart for chart in self._get_certain_chart_type('DensityChart') if chart.xdata_type])
+
+        bars = [chart for chart in self._get_certain_chart_type('BarChart') if chart.xdata_type]
+        if profiler is not None and bars:
+            start = time.perf_counter()
+            self._draw_bars(bars)
+            profiler.add('bars', start)
         else:
-            for i in range(len(ticks)):
-                ticks[i] = startpos + i * self.xdata_gap
+            self._draw_bars(bars)
+
+        # charts created without data, to be filled with append, are skipped until their first points
+        charts = []
+        for chart_type in ['LineChart','ScatterChart']:
+            charts += [chart for chart in self._get_certain_chart_type(chart_type) if chart.xdata_type]
+        self._draw_charts(charts)
+
+
+
+class Gridlines(Area):
+    '''
+    Vertical and horizontal gridlines at tick positions. Rendered to its own layer with the size of chart area, which is the
+    base of chart area layer. Therefore gridlines are re-rendered only when ticks or chart area change, not with chart data
+    '''
+    __slots__ = ()
+
+    def __init__(self, figure):
+        super().__init__(figure)
+
+    def _get_layer_rect(self):
+        chart_area = self.figure.chart_area
+        self.x, self.y, self.width, self.height = chart_area.x, chart_area.y, chart_area.width, chart_area.height
+        self.show = chart_area.gridlines
+        return super()._get_layer_rect()
+
+    def _signature(self):
+        return (self.figure.xaxis_tick._signature(), self.figure.yaxis_tick._signature())
 
-        for tick in ticks:
-            pygame.draw.aaline(self.figure.background, GRID_COLOR, (tick, self.y), (tick, self.y + self.height))
+    def _draw_vertical_gridlines(self):
+        for tick in self.figure.xaxis_tick._tick_positions():
+            tick = tick - self.layer_rect.x
+            pygame.draw.aaline(self.layer, GRID_COLOR, (tick, 0), (tick, self.height))
 
     def _draw_horizontal_gridlines(self):
-        ticks = self.figure.yaxis_tick.ticks
-        startpos = self.y + self.chart_margin
-        ticks = [startpos + (self.figure.yaxis_tick.ymax - i) * self.ydata_multiplier for i in ticks]
+        for tick in self.figure.yaxis_tick._tick_positions():
+            tick = tick - self.layer_rect.y
+            pygame.draw.aaline(self.layer, GRID_COLOR, (0, tick), (self.width, tick))
+
+    def _draw(self):
+        self._draw_horizontal_gridlines()
+        self._draw_vertical_gridlines()
 
-        for tick in ticks:
-            pygame.draw.aaline(self.figure.background, GRID_COLOR, (self.x, tick), (self.x + self.width, tick))
+    def _blit_layer(self):
+        # composed into chart area layer instead of figure background
+        pass
 
-    def _draw_gridlines(self):
-        if self.gridlines:
-            self._draw_horizontal_gridlines()
-            self._draw_vertical_gridlines()
 
 
+class SeriesBuffer:
+    '''
+    Storage for one data column of a chart. SeriesBuffer.data is a contiguous array of the stored values in order.
+    Without capacity, initial array is used without a copy and the storage grows by doubling when values are appended.
+    With capacity, only the last capacity values are kept in a ring buffer. Each value is written twice, at i and i + capacity,
+    so the window is always contiguous. Appending k values costs O(k) in both cases, regardless of the history length.
+    Min and max of finite numeric values are kept up to date on every change. Ring buffer keeps monotonic deques of (index, value)
+    for the extrema of the sliding window. With order, index of the last value smaller than the one before it is kept, so
+    whether the values are sorted is known in O(1), also after older values are pushed out of the ring buffer
+    data:       array   initial values
+    capacity:   int     maximum number of values kept. Default None keeps all values
+    extrema:    boolean False if min and max are not needed
+    order:      boolean True to keep track of the order of values
+    '''
+    def __init__(self, data, capacity=None, extrema=True, order=False):
+        if capacity is not None and capacity < 1:
+            raise KeyError('max_points must be a positive number!')
+        self.capacity = capacity
+        self.extrema = extrema
+        self.order = order and data.dtype != object
+        self.set(data)
+
+    def set(self, data):
+        # replaces all values
+        self.numeric = self.extrema and data.dtype != object
+        # index of the last value out of order, counted from the first value ever added
+        self.descent = -1
+        if self.capacity is None:
+            self.buffer = data
+            self.owned = False
+            self.start = 0
+            self.length = len(data)
+            self.min, self.max = finite_min_max(data) if self.numeric else (None, None)
+            if self.order:
+                self.descent = last_descent(data)
+        else:
+            data = data[-self.capacity:]
+            self.buffer = np.empty(2 * self.capacity, dtype=data.dtype)
+            self.start = 0
+            self.length = 0
+            # index of the next value appended, counted from the first value ever added
+            self.count = 0
+            self.min_deque = deque()
+            self.max_deque = deque()
+            self.min = self.max = None
+            self._extend_ring(data)
+
+    @property
+    def data(self):
+        return self.buffer[self.start:self.start + self.length]
+
+    @property
+    def sorted(self):
+        # True if values are in non-decreasing order, None if order is not tracked. the first value in the window may be smaller
+        # than a value pushed out before it
+        if not self.order:
+            return None
+        first = self.count - self.length if self.capacity is not None else 0
+        return self.descent <= first
+
+    def _track_order(self, values, index):
+        # values are added at index, counted from the first value ever added
+        if self.order and len(values):
+            descent = last_descent(values, self.buffer[self.start + self.length - 1] if self.length else None)
+            if descent >= 0:
+                self.descent = index + descent
+
+    def frozen(self):
+        # copy of the buffer which keeps its values while the buffer changes. growable storage is written only past the values
+        # of the copy and is shared, values of ring buffer are overwritten and the window is copied
+        frozen = copy.copy(self)
+        if self.capacity is not None:
+            frozen.buffer = self.data.copy()
+            frozen.start = 0
+        return frozen
+
+    def extend(self, values):
+        if self.capacity is None:
+            self._extend_growable(values)
+        else:
+            self._extend_ring(values)
+
+    def _extend_growable(self, values):
+        self._track_order(values, self.length)
+        end = self.length + len(values)
+        if not self.owned or end > len(self.buffer):
+            # initial array is not written on, values are copied to own storage at the first append
+            buffer = np.empty(max(end, 2 * len(self.buffer), 16), dtype=self.buffer.dtype)
+            buffer[:self.length] = self.data
+            self.buffer = buffer
+            self.owned = True
+        self.buffer[self.length:end] = values
+        self.length = end
+        if self.numeric:
+            low, high = finite_min_max(values)
+            if low is not None:
+                self.min = low if self.min is None else min(self.min, low)
+                self.max = high if self.max is None else max(self.max, high)
+
+    def _extend_ring(self, values):
+        self._track_order(values, self.count)
+        capacity = self.capacity
+        k = len(values)
+        if k >= capacity:
+            self.buffer[:capacity] = self.buffer[capacity:] = values[-capacity:]
+            self.start = 0
+            self.length = capacity
+        else:
+            positions = (self.start + self.length + np.arange(k)) % capacity
+            self.buffer[positions] = values
+            self.buffer[positions + capacity] = values
+            overflow = max(self.length + k - capacity, 0)
+            self.start = (self.start + overflow) % capacity
+            self.length = min(self.length + k, capacity)
+        self.count += k
+        if self.numeric:
+            self._update_window_extrema(values)
+
+    def _update_window_extrema(self, values):
+        # sliding window min and max. pushing a value removes all values it makes irrelevant from the back of the deques, and
+        # values out of the window are removed from the front. large batches rebuild the deques from the window at once
+        first = self.count - self.length
+        if len(values) >= 64 and len(values) * 32 >= self.length:
+            data = self.data
+            for dq, minimum in ((self.min_deque, True), (self.max_deque, False)):
+                indices = monotonic_indices(data, minimum)
+                dq.clear()
+                dq.extend(zip((indices + first).tolist(), data[indices].tolist()))
+        else:
+            min_deque, max_deque = self.min_deque, self.max_deque
+            index = self.count - len(values)
+            for value in values.tolist():
+                if -math.inf < value < math.inf:
+                    while min_deque and min_deque[-1][1] >= value:
+                        min_deque.pop()
+                    min_deque.append((index, value))
+                    while max_deque and max_deque[-1][1] <= value:
+                        max_deque.pop()
+                    max_deque.append((index, value))
+                index += 1
+            for dq in (min_deque, max_deque):
+                while dq and dq[0][0] < first:
+                    dq.popleft()
+        self.min = self.min_deque[0][1] if self.min_deque else None
+        self.max = self.max_deque[0][1] if self.max_deque else None
+
 
 class ChartType:
-    def __init__(self, name, xdata, ydata, color):
+    '''
+    Base class for all chart types. Numeric data is kept as contiguous float64 arrays. float64 numpy arrays and buffers
+    (e.g. array.array('d')) are used without a copy, categorical xdata is kept as an object array of strings.
+    With max_points, only the last max_points points are kept and appended points push out the oldest ones
+    x_sorted is True if numeric xdata is declared to be in non-decreasing order, False if it must not be treated as sorted.
+    Default None detects it. Visible points of sorted xdata are found with binary search
+    Chart types declare their attributes in __slots__
+    '''
+    __slots__ = ('name', 'color', 'max_points', 'declared_sorted', 'xdata_type', 'xbuffer', 'ybuffer', 'version', 'xcodes')
+
+    def __init__(self, name, xdata, ydata, color, max_points=None, trusted=False, x_sorted=None):
         self.name = name
-        check = check_xy_data(xdata, ydata)
-        if check:
-            self.xdata = xdata
-            self.ydata = ydata
-        if type(self.xdata[0]) in (int, float):
-            self.xdata_type = 'numeric'
-        else:
-            self.xdata_type = 'str'
         self.color = color
+        self.max_points = max_points
+        self.declared_sorted = x_sorted
+        self.xdata_type = None
+        self.xbuffer = self.ybuffer = None
+        # increased whenever data of the chart changes
+        self.version = 0
+        # codes of string xdata in category index of chart area
+        self.xcodes = None
+        self.set_data(xdata, ydata, trusted)
+
+    @property
+    def xdata(self):
+        return self.xbuffer.data
+
+    @property
+    def ydata(self):
+        return self.ybuffer.data
+
+    @property
+    def x_sorted(self):
+        # True if numeric xdata is known to be in non-decreasing order
+        if self.declared_sorted is not None:
+            return self.declared_sorted
+        return bool(self.xbuffer.sorted)
+
+    def _convert_data(self, xdata, ydata, trusted=False):
+        # validates data and converts it to arrays. returns xdata type with arrays
+        xdata_type = check_xy_data(xdata, ydata, trusted)
+        if xdata_type == 'str':
+            xdata = np.array([str(i) for i in xdata], dtype=object)
+        else:
+            xdata = as_float_array(xdata)
+        return xdata_type, xdata, as_float_array(ydata)
+
+    def set_data(self, xdata, ydata, trusted=False):
+        '''
+        Replaces all data of the chart. Trusted data is not checked element by element
+        '''
+        xdata_type, xdata, ydata = self._convert_data(xdata, ydata, trusted)
+        self._set_arrays(xdata_type, xdata, ydata)
+
+    def _set_arrays(self, xdata_type, xdata, ydata):
+        self.xdata_type = xdata_type
+        self.xbuffer = SeriesBuffer(xdata, self.max_points, order=self.declared_sorted is None)
+        self.ybuffer = SeriesBuffer(ydata, self.max_points)
+        self.version += 1
+
+    def _refresh(self):
+        # data was modified in place. extrema and order are calculated again and caches of the data are dropped
+        self.xbuffer.set(self.xdata)
+        self.ybuffer.set(self.ydata)
+        self.version += 1
+
+    def _frame(self):
+        # copy of the chart with frozen data, drawn while the chart changes on another thread
+        frame = copy.copy(self)
+        frame.xbuffer = self.xbuffer.frozen()
+        frame.ybuffer = self.ybuffer.frozen()
+        if self.xcodes is not None:
+            frame.xcodes = self.xcodes.frozen()
+        return frame
+
+    def _keep_caches(self, frame):
+        # takes over caches calculated while the frame copy of the chart was drawn
+        pass
+
+    def extend(self, xdata, ydata, trusted=False):
+        '''
+        Appends points to the end of the chart data. Only new points are validated
+        '''
+        self._extend_arrays(*self._convert_data(xdata, ydata, trusted))
+
+    def _extend_arrays(self, xdata_type, xdata, ydata):
+        # appends converted points. the chart is not changed if the type of xdata does not match
+        if not len(xdata):
+            return
+        if self.xdata_type is None:
+            # first points of a chart created without data
+            self._set_arrays(xdata_type, xdata[:0], ydata[:0])
+        elif self.xdata_type != xdata_type:
+            raise KeyError('All charts must have the same type for xdata!')
+        self.xbuffer.extend(xdata)
+        self.ybuffer.extend(ydata)
+        self.version += 1
+
+    def append(self, x, y):
+        '''
+        Appends one point to the end of the chart data
+        '''
+        self.extend([x], [y])
 
 
 class LineChart(ChartType):
-    def __init__(self, name, xdata, ydata, color, line_width):
-        super().__init__(name, xdata, ydata, color)
+    __slots__ = ('line_width', 'antialias', 'point_budget', 'lod_cache')
+
+    def __init__(self, name, xdata, ydata, color, line_width, point_budget=None, max_points=None, trusted=False, x_sorted=None,
+                 antialias=None):
+        super().__init__(name, xdata, ydata, color, max_points, trusted, x_sorted)
         self.line_width = line_width
+        self.antialias = antialias
+        # maximum number of points to draw before level of detail downsampling. None is LOD_POINTS_PER_COLUMN for each pixel
+        # column of chart area, 0 disables downsampling
+        self.point_budget = point_budget
+        self.lod_cache = None
+
+    @property
+    def antialiased(self):
+        # unless set, only lines 1 pixel wide are antialiased, with one aalines pass like a solid line
+        if self.antialias is not None:
+            return self.antialias
+        return max(int(round(self.line_width)), 1) == 1
+
+    def _refresh(self):
+        super()._refresh()
+        self.lod_cache = None
+
+    def _keep_caches(self, frame):
+        # level of detail is keyed by data version, a cache of older data is not used
+        self.lod_cache = frame.lod_cache
 
 class BarChart(ChartType):
-    def __init__(self, name, xdata, ydata, color, bar_width):
-        super().__init__(name, xdata, ydata, color)
+    __slots__ = ('bar_width',)
+
+    def __init__(self, name, xdata, ydata, color, bar_width, max_points=None, trusted=False, x_sorted=None):
+        super().__init__(name, xdata, ydata, color, max_points, trusted, x_sorted)
         self.bar_width = bar_width
 
+class DensityChart(ChartType):
+    __slots__ = ('histogram', 'histogram_key', 'binned', 'bin_codes', 'generation', 'colors', 'image', 'bins', 'colormap', 'log')
+
+    def __init__(self, name, xdata, ydata, color, bins=None, colormap=None, log=True, max_points=None, trusted=False, x_sorted=None):
+        # 2d histogram of points. histogram_key is the bins and axis ranges it was counted for, and binned is the number of
+        # points counted. with max_points, bin_codes is the bin of each point in the window, -1 out of axis ranges. generation
+        # is increased whenever the points are counted from scratch. colors is the colormap with its lookup table, image is the
+        # surface the histogram is colored on
+        self.histogram = None
+        self.histogram_key = None
+        self.binned = 0
+        self.bin_codes = None
+        self.generation = 0
+        self.colors = None
+        self.image = None
+        super().__init__(name, xdata, ydata, color, max_points, trusted, x_sorted)
+        self.bins = bins
+        self.colormap = colormap
+        self.log = log
+
+    def _convert_data(self, xdata, ydata, trusted=False):
+        xdata_type, xdata, ydata = super()._convert_data(xdata, ydata, trusted)
+        if xdata_type == 'str':
+            raise KeyError('xdata of density chart must include only number types!')
+        return xdata_type, xdata, ydata
+
+    def _set_arrays(self, xdata_type, xdata, ydata):
+        # replaced data is counted again
+        super()._set_arrays(xdata_type, xdata, ydata)
+        self.histogram_key = None
+        self.generation += 1
+
+    def _refresh(self):
+        super()._refresh()
+        self.histogram_key = None
+        self.generation += 1
+
+    def _keep_caches(self, frame):
+        # counts of data replaced after the frame copy was taken are not kept
+        if frame.generation == self.generation:
+            self.histogram, self.histogram_key, self.binned, self.bin_codes = frame.histogram, frame.histogram_key, frame.binned, frame.bin_codes
+            self.colors, self.image = frame.colors, frame.image
+
 class ScatterChart(ChartType):
-    def __init__(self, name, xdata, ydata, color, radius):
-        super().__init__(name, xdata, ydata, color)
-        self.radius = radius
\ No newline at end of file
+    __slots__ = ('radius', 'marker')
+
+    def __init__(self, name, xdata, ydata, color, radius, max_points=None, marker='circle', trusted=False, x_sorted=None):
+        super().__init__(name, xdata, ydata, color, max_points, trusted, x_sorted)
+        self.radius = radius
+        # shape of the marker, one of MarkerCache.shapes
+        self.marker = marker
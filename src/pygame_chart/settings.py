@@ -5,10 +5,29 @@ TITLE_FONT_SIZE = 14
 TEXT_COLOR = (0,0,0)
 PADDING = 5
 MAX_TICK = 10
+# ticks of auto-scaled axes are kept while the data stays within them and spans at least this fraction of them.
+# 1 calculates ticks again on every change of data range
+TICK_HYSTERESIS = 0.5
+# minimum space in pixels between category labels on x-axis. labels which would be closer are left out
+TICK_LABEL_GAP = PADDING
 GRID_COLOR = (224,224,224)
 CHART_MARGIN = 10
 MIN_LEGEND_LINE_HEIGHT = 10
 LEGEND_ITEM_WIDTH = 10
+TEXT_CACHE_SIZE = 512
+LOD_POINTS_PER_COLUMN = 4
+SCATTER_DEDUPLICATE_POINTS = 4096
+# points passed to pygame.draw in one call. each call makes a short-lived list for each point, fewer of them than the
+# threshold of the garbage collector (700), so drawing long lines does not trigger garbage collections
+POLYLINE_CHUNK = 256
+PROFILER_WINDOW = 60
+ZOOM_STEP = 0.1
+# share of chart color in the color of density chart bins with the fewest points, the rest is figure background
+DENSITY_MIN_SHADE = 0.2
+PROFILER_TEXT_COLOR = (255,255,255)
+PROFILER_BG_COLOR = (0,0,0)
+# profiler phase of each figure layer, other layers are text
+PROFILER_LAYER_PHASES = {'gridlines': 'gridlines', 'chart_area': 'charts'}
 
 
 COLORS = [
@@ -1,11 +1,51 @@
-import math
+import math, numbers, functools
+import numpy as np
 from .settings import *
 
+def is_array_like(data):
+    # numpy arrays and objects supporting buffer protocol (array.array, memoryview) are handled as numeric arrays
+    if isinstance(data, np.ndarray):
+        return True
+    if isinstance(data, (str, bytes, bytearray)):
+        return False
+    try:
+        memoryview(data)
+    except TypeError:
+        return False
+    return True
+
+NUMBER_TYPES = (int, float)
+# struct format characters of numeric buffers (array.array, memoryview)
+NUMERIC_FORMATS = 'bBhHiIlLqQnNefd'
+
+def is_number(value):
+    # int, float and other real numbers like numpy scalars. bool is not accepted
+    return type(value) in NUMBER_TYPES or isinstance(value, numbers.Real) and not isinstance(value, bool)
+
+def array_kind(data):
+    # 'numeric', 'str', 'object' or 'invalid' for ranges, numpy arrays and buffers, known from their type in O(1).
+    # None for other data, which must be checked element by element. object arrays are also checked element by element
+    if isinstance(data, range):
+        return 'numeric'
+    if isinstance(data, np.ndarray):
+        kind = data.dtype.kind
+    elif is_array_like(data):
+        kind = 'f' if memoryview(data).format.lstrip('@=<>!') in NUMERIC_FORMATS else 'invalid'
+    else:
+        return None
+    if kind in 'iuf':
+        return 'numeric'
+    elif kind == 'U':
+        return 'str'
+    elif kind == 'O':
+        return 'object'
+    return 'invalid'
+
 def check_input_type(xdata, ydata):
-    if type(xdata) == type(ydata) == list:
+    if all(type(data) in (list, tuple, range) or is_array_like(data) for data in (xdata, ydata)):
         return True
     else:
-        raise KeyError('xdata and ydata must be list type!')
+        raise KeyError('xdata and ydata must be list, tuple, range or array type!')
 
 def check_input_length(xdata, ydata):
     if len(xdata) == len(ydata):
@@ -14,28 +54,159 @@ def check_input_length(xdata, ydata):
         raise KeyError('xdata and ydata must be the same length!')
 
 def check_all_number(lst):
-    non_number_types = list(filter(lambda i: i not in (int, float), [type(i) for i in lst]))
-    check = False if non_number_types else True
-    return check
+    # one pass, stops at the first element which is not a number
+    kind = array_kind(lst)
+    if kind not in (None, 'object'):
+        return kind == 'numeric'
+    for i in lst:
+        if type(i) not in NUMBER_TYPES and not is_number(i):
+            return False
+    return True
 
 def check_all_string(lst):
-    non_string_types = list(filter(lambda i: i != str, [type(i) for i in lst]))
-    check = False if non_string_types else True
-    return check
+    # one pass, stops at the first element which is not a string
+    kind = array_kind(lst)
+    if kind not in (None, 'object'):
+        return kind == 'str'
+    for i in lst:
+        if type(i) != str:
+            return False
+    return True
+
+def get_xdata_type(xdata):
+    # 'numeric' or 'str' according to the dtype or the first element of xdata, None if there is no data
+    if not len(xdata):
+        return None
+    kind = array_kind(xdata)
+    if kind in ('numeric', 'str'):
+        return kind
+    return 'numeric' if is_number(xdata[0]) else 'str'
 
-def check_xy_data(xdata, ydata):
+def check_xy_data(xdata, ydata, trusted=False):
+    # validates chart data and returns the type of xdata, 'numeric' or 'str', None if there is no data.
+    # each list is checked in one pass, arrays and ranges by their type. trusted data is not checked element by element
     if check_input_type(xdata, ydata):
         if check_input_length(xdata, ydata):
+            xdata_type = get_xdata_type(xdata)
+            if trusted or xdata_type is None:
+                return xdata_type
             if check_all_number(ydata):
-                if check_all_number(xdata):
-                    return True
-                elif check_all_string(xdata):
-                    return True
+                if xdata_type == 'numeric' and check_all_number(xdata):
+                    return xdata_type
+                elif xdata_type == 'str' and check_all_string(xdata):
+                    return xdata_type
                 else:
                     raise KeyError('xdata must include only number only string types!')
             else:
                 raise KeyError('ydata must include only number types!')
 
+def as_float_array(data):
+    # contiguous float64 array of numeric data. float64 numpy arrays and buffers are used without a copy
+    if isinstance(data, range):
+        return np.arange(data.start, data.stop, data.step, dtype=np.float64)
+    return np.ascontiguousarray(data, dtype=np.float64)
+
+def data_equal(old, new):
+    # True if new data is the same as old data. an array sharing memory with old data might be modified in place, so it counts
+    # as changed
+    if isinstance(old, np.ndarray):
+        if is_array_like(new) and np.may_share_memory(old, np.asarray(new)):
+            return False
+        return len(old) == len(new) and np.array_equal(old, new)
+    return old == list(new)
+
+def is_sorted(data):
+    # True if array is in non-decreasing order
+    return bool(np.all(data[1:] >= data[:-1]))
+
+def last_descent(data, previous=None):
+    # index of the last value which is not greater than or equal to the value before it, -1 if all values are in order. nan is
+    # never in order. previous is the value before data, if any
+    if previous is not None:
+        descents = np.flatnonzero(~(data >= np.concatenate(([previous], data[:-1]))))
+    else:
+        descents = np.flatnonzero(~(data[1:] >= data[:-1])) + 1
+    return int(descents[-1]) if len(descents) else -1
+
+def finite_min_max(data):
+    # min and max of data ignoring nan and infinite values. None if there is no finite value
+    if not len(data):
+        return None, None
+    low, high = float(np.fmin.reduce(data)), float(np.fmax.reduce(data))
+    if math.isfinite(low) and math.isfinite(high):
+        return low, high
+    data = data[np.isfinite(data)]
+    if not len(data):
+        return None, None
+    return float(data.min()), float(data.max())
+
+def monotonic_indices(data, minimum=True):
+    # indices a monotonic deque keeps after all data is pushed, i.e. values smaller (larger if not minimum) than all later
+    # values. front of the deque is min (max) of data and it stays so while older values are removed. nan and infinite values
+    # are skipped
+    if not len(data):
+        return np.arange(0)
+    values = np.where(np.isfinite(data), data, np.nan)
+    if not minimum:
+        values = -values
+    later = np.append(np.fmin.accumulate(values[::-1])[::-1][1:], np.inf)
+    return np.flatnonzero((values < later) | np.isnan(later) & ~np.isnan(values))
+
+def minmax_indices(columns, ydata):
+    # indices of first, min, max and last point for each run of points in the same column, in original order. columns is the
+    # non-decreasing column number of each point. drawing only these points gives the same shape as drawing all of them
+    n = len(columns)
+    if n == 0:
+        return np.arange(0)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(columns)) + 1))
+    counts = np.diff(np.append(starts, n))
+    ends = starts + counts - 1
+    run = np.repeat(np.arange(len(starts)), counts)
+    index = np.arange(n)
+    ymin = np.minimum.reduceat(ydata, starts)
+    ymax = np.maximum.reduceat(ydata, starts)
+    # first index reaching min/max of its column. nan values never match, in that case end of the column is used
+    argmin = np.minimum(np.minimum.reduceat(np.where(ydata == ymin[run], index, n), starts), ends)
+    argmax = np.minimum(np.minimum.reduceat(np.where(ydata == ymax[run], index, n), starts), ends)
+    keep = np.sort(np.stack((starts, argmin, argmax, ends), axis=1), axis=1).ravel()
+    return keep[np.append(True, np.diff(keep) != 0)]
+
+def _clip_ends(xa, ya, xb, yb, low, high):
+    # moves ends a of segments a-b which are out of low <= y <= high to the crossing of the segment with the nearest bound
+    bound = np.clip(ya, low, high)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(ya != bound, (bound - ya) / (yb - ya), 0)
+    return xa + t * (xb - xa), bound
+
+def clip_polyline(x, y, low, high):
+    # parts of the polyline within low <= y <= high as a list of (x, y) arrays. segments out of the range on one side and
+    # segments with a nan end are dropped, segments crossing the range are cut at its bounds. a point out of the range or a
+    # dropped segment splits the polyline
+    if len(x) < 2:
+        return []
+    inside = (y >= low) & (y <= high)
+    if inside.all():
+        return [(x, y)]
+    finite = np.isfinite(x) & np.isfinite(y)
+    ya, yb = y[:-1], y[1:]
+    visible = finite[:-1] & finite[1:] & ~((ya < low) & (yb < low)) & ~((ya > high) & (yb > high))
+    segments = np.flatnonzero(visible)
+    if not len(segments):
+        return []
+    xs, ys = _clip_ends(x[segments], y[segments], x[segments + 1], y[segments + 1], low, high)
+    xe, ye = _clip_ends(x[segments + 1], y[segments + 1], x[segments], y[segments], low, high)
+    # a part continues through the start point of a segment only if it is inside and the segment before it is visible
+    starts = np.flatnonzero(np.append(True, (segments[1:] != segments[:-1] + 1) | ~inside[segments[1:]]))
+    ends = np.append(starts[1:], len(segments))
+    return [(np.append(xs[start], xe[start:end]), np.append(ys[start], ye[start:end])) for start, end in zip(starts, ends)]
+
+def colormap_lut(stops, size=256):
+    # size x 3 array of colors interpolated evenly between RGB color stops, from low to high values
+    stops = np.asarray(stops, dtype=np.float64).reshape(-1, 3)
+    positions = np.linspace(0, 1, len(stops))
+    samples = np.linspace(0, 1, size)
+    return np.stack([np.interp(samples, positions, stops[:, i]) for i in range(3)], axis=1).round().astype(np.uint8)
+
 def check_axis_limit(lim):
     if (type(lim) == tuple) & (len(lim) == 2):
         if lim[1] > lim[0]:
@@ -48,35 +219,37 @@ def check_axis_limit(lim):
     else:
         raise Warning('Axis limit must be tuple with two numbers. Auto-calculated xlim is applied.')
 
+TICK_SIZES = (5.0, 2.0, 1.0, 0.5, 0.25, 0.2, 0.1, 0.05, 0.02, 0.01)
 
-def create_range(start, stop):
-    lst = []
-    i = start
-    while i < stop:
-        lst.append(i)
-        i += 1
-    #lst.append(i)
-    return lst
-
-def tick_range(mindata, maxdata):
+@functools.lru_cache(maxsize=256)
+def tick_range(mindata, maxdata, max_tick=MAX_TICK):
+    # tuple of evenly spaced ticks from a multiple of tick size below or at mindata to one above or at maxdata. tick size is
+    # the smallest of TICK_SIZES scaled to data span that gives no more than about max_tick ticks. results are cached, since
+    # streaming data asks for the same ranges frame after frame. zero span is widened around the value
+    if not (math.isfinite(mindata) and math.isfinite(maxdata)):
+        raise KeyError('axis range must be finite numbers!')
+    if maxdata < mindata:
+        mindata, maxdata = maxdata, mindata
     data_span = maxdata - mindata
+    if data_span == 0:
+        margin = abs(mindata) / 10 if mindata else 1.0
+        return tick_range(mindata - margin, maxdata + margin, max_tick)
     scale = 10 ** math.floor(math.log10(data_span))
-    tick_size_normalized_list = [5.0, 2.0, 1.0, 0.5, 0.25, 0.2, 0.1, 0.05, 0.02, 0.01]
-    tick_size_normalized = 1.0
-    for i in range(len(tick_size_normalized_list)):
-        num_tick = data_span / scale / tick_size_normalized_list[i]
-        if num_tick > MAX_TICK:
-            tick_size_normalized = tick_size_normalized_list[i-1]
+    tick_size = TICK_SIZES[0] * scale
+    for size in TICK_SIZES[1:]:
+        if data_span / scale / size > max_tick:
             break
-    tick_size = tick_size_normalized * scale
-    ticks = create_range(mindata/tick_size, maxdata/tick_size)
-    ticks = [i * tick_size for i in [round(i) for i in ticks]]
-    if maxdata > max(ticks):
-        maxtick = ticks[-1] + ticks[-1] - ticks[-2]
-        ticks.append(maxtick)
-    if mindata < min(ticks):
-        mintick = ticks[0] - (ticks[1] - ticks[0])
-        ticks = [mintick] + ticks
-    ticks = [round(i, 5) for i in ticks]
-    return ticks
+        tick_size = size * scale
+    # tolerance keeps a bound which is a multiple of tick size from adding one more tick due to float error
+    first = math.floor(mindata / tick_size + 1e-9)
+    last = math.ceil(maxdata / tick_size - 1e-9)
+    digits = max(5, 2 - math.floor(math.log10(tick_size)))
+    return tuple(round(i * tick_size, digits) for i in range(first, last + 1))
+
+def stable_ticks(ticks, mindata, maxdata, hysteresis=TICK_HYSTERESIS):
+    # previous ticks are kept while data is within them and spans at least hysteresis of their range, so that ticks do not
+    # jump with small changes of data extrema. otherwise ticks are calculated for the new range
+    if ticks and ticks[0] <= mindata and maxdata <= ticks[-1] and maxdata - mindata >= hysteresis * (ticks[-1] - ticks[0]):
+        return ticks
+    return tick_range(mindata, maxdata)
 
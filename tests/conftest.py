@@ -0,0 +1,14 @@
+import os, sys
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+import pygame
+import pytest
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+import pygame_chart as pyc
+
+
+@pytest.fixture
+def figure():
+    # figure on an offscreen surface
+    pygame.init()
+    surface = pygame.Surface((400, 300))
+    return pyc.Figure(surface, 0, 0, 400, 300)
@@ -0,0 +1,132 @@
+'''
+Allocation checks for steady-state frames of Figure.draw. Each workload streams data into a figure and draws it frame
+after frame. Frames warm up until the sizes of the caches stop changing, a frame which adds a text surface, tick range or
+label width allocates memory which is kept on purpose. Window extrema of ring buffers keep the index of each value, and
+indices below 257 are cached small ints of CPython which are not freed when they are pushed out of the window, so frames
+also warm up until these indices left the windows. After that, memory traced with tracemalloc must not grow by more
+than MAX_GROWTH bytes per frame and the frames must not trigger more than MAX_COLLECTIONS garbage collections per frame.
+Short-lived objects which pile up within a frame, like a list for each point of a line, trigger collections of the
+garbage collector, and collections of the oldest generation scan every object of the application.
+'''
+import gc, tracemalloc
+import numpy as np
+import pygame
+import pytest
+import pygame_chart as pyc
+from pygame_chart import pygame_chart, util_functions
+
+POINTS = 5000
+CATEGORIES = ['c%d' % i for i in range(200)]
+# category ydata cycles through a fixed set of rows, so that the tick labels of the y axis repeat
+CATEGORY_ROWS = np.random.default_rng(1).normal(size=(16, len(CATEGORIES)))
+FRAMES = 200
+# frames without a change of cache sizes before frames are measured, and frames after which the caches must have settled
+STABLE_FRAMES = 50
+MAX_WARMUP = 3000
+SMALL_INTS = 257
+MAX_GROWTH = 64
+MAX_COLLECTIONS = 0.02
+
+
+def make_figure(surface, xtype):
+    figure = pyc.Figure(surface, 0, 0, surface.get_width(), surface.get_height())
+    figure.add_title('allocations')
+    figure.add_xaxis_label('x')
+    figure.add_yaxis_label('y')
+    figure.add_legend()
+    figure.add_gridlines()
+    rng = np.random.default_rng(0)
+    if xtype == 'numeric':
+        xdata = np.arange(POINTS, dtype=np.float64)
+        figure.line('thick', xdata, rng.normal(size=POINTS), line_width=3, max_points=POINTS)
+        figure.line('thin', xdata, rng.normal(size=POINTS) + 5, line_width=1, max_points=POINTS)
+        figure.scatter('scatter', xdata, rng.normal(size=POINTS) - 5, max_points=POINTS)
+        figure.bar('bar', xdata[:100], rng.normal(size=100), max_points=100)
+    else:
+        figure.bar('bar', CATEGORIES, rng.normal(size=len(CATEGORIES)))
+        figure.line('line', CATEGORIES, rng.normal(size=len(CATEGORIES)), line_width=3)
+    return figure
+
+def stream_frame(figure, frame, rng):
+    # one new point for each chart, the oldest one is pushed out
+    x = POINTS + frame
+    figure.append('thick', x, rng.normal())
+    figure.append('thin', x, rng.normal() + 5)
+    figure.append('scatter', x, rng.normal() - 5)
+    figure.append('bar', 100 + frame, rng.normal())
+    figure.draw()
+
+def category_frame(figure, frame, rng):
+    # ydata of all categories is replaced
+    ydata = CATEGORY_ROWS[frame % len(CATEGORY_ROWS)]
+    figure.line('line', CATEGORIES, ydata)
+    figure.bar('bar', CATEGORIES, -ydata)
+    figure.draw()
+
+def cache_sizes(figure):
+    # sizes of the caches which are filled while frames are drawn
+    return (len(pygame_chart.text_cache.surfaces), util_functions.tick_range.cache_info().currsize,
+            len(pygame_chart.marker_cache.sprites), len(pygame_chart.polyline_renderer.discs),
+            len(figure.xaxis_tick.label_widths), len(figure.xaxis_tick.glyph_advances),
+            len(figure.chart_area.bar_sprites))
+
+def window_start(figure):
+    # smallest index of the first value in the window of a ring buffer
+    return min((buffer.count - buffer.length for chart in figure.chart_area.series.values()
+                for buffer in (chart.xbuffer, chart.ybuffer) if buffer.capacity is not None), default=SMALL_INTS)
+
+def warm_up(figure, frame_function, rng, frame):
+    # draws frames until cache sizes did not change for STABLE_FRAMES frames and small int indices left the windows of ring
+    # buffers, returns the next frame
+    sizes, stable = cache_sizes(figure), 0
+    while stable < STABLE_FRAMES or window_start(figure) < SMALL_INTS:
+        assert frame < MAX_WARMUP, 'cache sizes did not settle: %r' % (sizes,)
+        frame_function(figure, frame, rng)
+        frame += 1
+        stable = stable + 1 if cache_sizes(figure) == sizes else 0
+        sizes = cache_sizes(figure)
+    return frame
+
+def measure(figure, frame_function, rng, frame):
+    # net growth of traced memory per frame, garbage collections per frame and whether the cache sizes changed
+    collections = [0]
+
+    def count(phase, info):
+        if phase == 'start':
+            collections[0] += 1
+
+    gc.collect()
+    sizes = cache_sizes(figure)
+    start = tracemalloc.get_traced_memory()[0]
+    gc.callbacks.append(count)
+    try:
+        for frame in range(frame, frame + FRAMES):
+            frame_function(figure, frame, rng)
+    finally:
+        gc.callbacks.remove(count)
+    gc.collect()
+    growth = tracemalloc.get_traced_memory()[0] - start
+    return growth / FRAMES, collections[0] / FRAMES, cache_sizes(figure) != sizes
+
+
+@pytest.mark.parametrize('xtype, frame_function', [('numeric', stream_frame), ('str', category_frame)],
+                         ids=['stream', 'category'])
+def test_steady_state_frames_do_not_allocate(xtype, frame_function):
+    # figure is created while tracing, so that objects replaced in frames were traced when they were allocated
+    pygame.init()
+    tracemalloc.start()
+    try:
+        figure = make_figure(pygame.Surface((800, 600)), xtype)
+        rng = np.random.default_rng(1)
+        frame = 0
+        while True:
+            frame = warm_up(figure, frame_function, rng, frame)
+            growth, collections, cache_changed = measure(figure, frame_function, rng, frame)
+            frame += FRAMES
+            # a new tick label of a streaming axis may show up while measuring, those frames count as warmup
+            if not cache_changed:
+                break
+    finally:
+        tracemalloc.stop()
+    assert growth <= MAX_GROWTH
+    assert collections <= MAX_COLLECTIONS
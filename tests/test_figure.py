@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+
+def test_failed_append_to_empty_chart_leaves_figure_drawable(figure):
+    figure.line('a', [], [])
+    figure.line('b', [1, 2, 3], [1, 2, 3])
+    with pytest.raises(KeyError):
+        figure.append('a', 'x', 1)
+    assert figure.chart_area.series['a'].xdata_type is None
+    figure.draw()
+    figure.append('a', 4, 1)
+    figure.draw()
+    assert len(figure.chart_area.series['a'].xdata) == 1
+
+
+def test_failed_append_keeps_chart_data(figure):
+    figure.line('a', [1, 2, 3], [1, 2, 3], max_points=3)
+    figure.draw()
+    with pytest.raises(KeyError):
+        figure.extend('a', ['x', 'y'], [4, 5])
+    np.testing.assert_array_equal(figure.chart_area.series['a'].xdata, [1, 2, 3])
+    figure.draw()
+
+
+def _pixel_y(figure, value):
+    # row of a y value on the figure
+    chart_area = figure.chart_area
+    return int(round(chart_area.y + chart_area.chart_margin + (chart_area.ydata_max - value) * chart_area.ydata_multiplier))
+
+def test_invalidate_after_in_place_change(figure):
+    # enough points for level of detail downsampling
+    xdata = np.arange(20000, dtype=np.float64)
+    ydata = np.zeros(20000)
+    figure.line('a', xdata, ydata, color=(255, 0, 0), line_width=1)
+    figure.draw()
+    assert figure.chart_area.all_ydata_max == 0
+    ydata[:] = 100
+    figure.invalidate()
+    figure.draw()
+    assert figure.chart_area.all_ydata_min == figure.chart_area.all_ydata_max == 100
+    x = int(figure.chart_area.x + figure.chart_area.width / 2)
+    assert figure.screen.get_at((x, _pixel_y(figure, 100)))[:3] == (255, 0, 0)
+
+def test_invalidate_density(figure):
+    xdata = np.zeros(1000)
+    ydata = np.zeros(1000)
+    figure.density('a', xdata, ydata, bins=10)
+    figure.set_xlim((0, 10))
+    figure.set_ylim((0, 10))
+    figure.draw()
+    chart = figure.chart_area.series['a']
+    assert chart.histogram[0, -1] == 1000
+    xdata[:] = 9.5
+    figure.invalidate()
+    figure.draw()
+    assert chart.histogram[-1, -1] == 1000 and chart.histogram.sum() == 1000
+
+@pytest.mark.parametrize('max_points', [None, 5])
+def test_infinite_values_are_not_extrema(figure, max_points):
+    figure.line('a', [1, 2, 3], [1, np.inf, 2], max_points=max_points)
+    figure.draw()
+    figure.append('a', 4, -np.inf)
+    figure.draw()
+    assert (figure.chart_area.all_ydata_min, figure.chart_area.all_ydata_max) == (1, 2)
+
+@pytest.mark.parametrize('order', ['sorted', 'insertion'])
+def test_windowed_categories_are_recycled(figure, order):
+    figure.set_category_order(order)
+    figure.line('a', [], [], max_points=3)
+    for i in range(1000):
+        figure.append('a', 'c%04d' % (999 - i), i)
+    figure.draw()
+    chart_area = figure.chart_area
+    assert len(chart_area.categories) <= 4
+    expected = ['c0000', 'c0001', 'c0002'] if order == 'sorted' else ['c0002', 'c0001', 'c0000']
+    assert chart_area.all_xdata == expected
+    x, _ = chart_area._visible_data(chart_area.series['a'])
+    np.testing.assert_array_equal(x, [2, 1, 0] if order == 'sorted' else [0, 1, 2])
+
+def test_single_category_is_centered(figure):
+    figure.bar('a', [], [], color=(0, 0, 255))
+    figure.append('a', 'first', 1)
+    figure.draw()
+    chart_area = figure.chart_area
+    center = chart_area.x + chart_area.chart_margin + (0 - chart_area.xdata_min) * chart_area.xdata_gap
+    assert center == pytest.approx(chart_area.x + chart_area.width / 2)
+    assert figure.screen.get_at((int(center), _pixel_y(figure, (chart_area.ydata_min + 1) / 2)))[:3] == (0, 0, 255)
+    figure.append('a', 'second', 2)
+    figure.draw()
+
+def test_draw_area_on_background(figure):
+    figure.add_title('title')
+    figure.line('a', [1, 2], [1, 2])
+    figure.chart_area.draw_area()
+    figure.chart_area.draw_area_border()
+    figure.draw()
+    title = figure.title
+    figure.background.fill((255, 0, 0))
+    title.draw_area()
+    title.draw_area_border()
+    assert figure.background.get_at((title.x, title.y))[:3] == (0, 0, 0)
+    assert figure.background.get_at((title.x + 1, title.y + 1))[:3] == tuple(figure.bg_color)
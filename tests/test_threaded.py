@@ -0,0 +1,37 @@
+import threading
+import numpy as np
+import pygame
+from pygame_chart.pygame_chart import ChartArea
+
+
+def test_layers_are_drawn_without_lock(figure, monkeypatch):
+    figure.line('a', [0, 1], [0, 1], max_points=10)
+    figure.scatter('b', [0, 1], [1, 0], max_points=10)
+    drawing, release = threading.Event(), threading.Event()
+    draw = ChartArea._draw
+
+    def blocking_draw(self):
+        drawing.set()
+        release.wait(5)
+        draw(self)
+
+    monkeypatch.setattr(ChartArea, '_draw', blocking_draw)
+    figure.enable_threaded_render()
+    try:
+        figure.draw()
+        assert drawing.wait(5)
+        # chart area is being drawn on the worker, methods changing the figure do not wait for it
+        assert figure.lock.acquire(timeout=1)
+        figure.lock.release()
+        for x in range(2, 30):
+            figure.append('a', x, x)
+            figure.append('b', x, -x)
+        release.set()
+        assert figure.wait_rendered(5)
+    finally:
+        release.set()
+        figure.disable_threaded_render()
+    threaded = pygame.surfarray.array3d(figure.background)
+    figure.invalidate()
+    figure.draw()
+    np.testing.assert_array_equal(threaded, pygame.surfarray.array3d(figure.background))